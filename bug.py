@@ -1,6 +1,6 @@
-from PIL import Image
+import os
 
-imagem = Image.open("/Users/home/Documents/github/dojo/roger_waters.jpg")\
+from PIL import Image
 
 # Este código contém um bug
 def limit_img_size(img:Image, limit=1024):
@@ -22,6 +22,8 @@ def limit_img_size(img:Image, limit=1024):
 
 
 if __name__ == '__main__':
+    imagem = Image.open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "roger_waters.jpg"))
+
     print(limit_img_size(imagem))
 
     limit_img_size(imagem).show()
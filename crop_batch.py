@@ -0,0 +1,173 @@
+"""
+Batch center crop: runs bug.limit_img_size over many images in a process pool.
+
+Takes a directory (its image files) or a glob pattern and writes each crop,
+same file name and format, into the output directory. Images found in
+subfolders by a recursive glob keep their path under the folder the pattern
+starts from, so equal names in different folders do not overwrite each
+other. A manifest in the output directory remembers the source mtime/size
+and the crop settings (limit, draft, quality) of every image written, so a
+second run only redoes what changed.
+
+    python crop_batch.py photos/ crops/ --limit 512
+    python crop_batch.py "shoots/**/*.jpg" crops/ --limit 256 --draft --workers 8
+
+--draft lets Pillow decode JPEGs at 1/2, 1/4 or 1/8 scale when the photo is
+much bigger than the crop. That is far faster, but the crop is then taken
+from the reduced image, so it shows a wider part of the scene than a full
+resolution crop of the same size. It is off by default for that reason.
+"""
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import resource
+import time
+
+from PIL import Image
+
+from bug import limit_img_size
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".bmp", ".gif", ".tif", ".tiff"}
+MANIFEST_NAME = ".crop_manifest.json"
+
+
+def find_images(source):
+    """Image files of a directory (not recursive), or the files matching a glob."""
+    if os.path.isdir(source):
+        paths = [entry.path for entry in os.scandir(source) if entry.is_file()]
+    else:
+        paths = [path for path in glob.glob(source, recursive=True) if os.path.isfile(path)]
+    return sorted(path for path in paths
+                  if os.path.splitext(path)[1].lower() in IMAGE_EXTENSIONS)
+
+
+def source_root(source):
+    """The directory output paths are relative to: source itself, or the fixed part of a glob."""
+    if os.path.isdir(source):
+        return source
+    parts = []
+    for part in os.path.normpath(source).split(os.sep):
+        if glob.has_magic(part):
+            break
+        parts.append(part)
+    else:
+        parts.pop()  # a plain file name
+    return os.sep.join(parts) or ("/" if os.path.isabs(source) else ".")
+
+
+def crop_file(src, dst, limit, draft=False, quality=90):
+    """Crop one image file into dst; returns the number of bytes written."""
+    with Image.open(src) as img:
+        fmt = img.format
+        if draft and fmt == "JPEG":
+            # Decode at the smallest 1/2^k scale that still covers limit x limit.
+            img.draft(img.mode, (limit, limit))
+        cropped = limit_img_size(img, limit)
+        options = {"quality": quality} if fmt in ("JPEG", "WEBP") else {}
+        cropped.save(dst, format=fmt, **options)
+    return os.path.getsize(dst)
+
+
+def _crop_task(task):
+    src, dst, limit, draft, quality = task
+    try:
+        return src, crop_file(src, dst, limit, draft, quality), None
+    except (OSError, ValueError, Image.DecompressionBombError) as exc:
+        return src, 0, f"{type(exc).__name__}: {exc}"
+
+
+def _stamp(path, limit, draft, quality):
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size, limit, draft, quality]
+
+
+def load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_manifest(out_dir, manifest):
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def peak_rss_mib():
+    """Peak resident set size of this process and of its (finished) workers, in MiB."""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    workers = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return own / 1024, workers / 1024  # ru_maxrss is in KiB on Linux
+
+
+def crop_batch(source, out_dir, limit=1024, draft=False, quality=90, workers=None, force=False):
+    """
+    Crop every image of source into out_dir. Returns a summary dict with the
+    counts of cropped, skipped (up to date) and failed images.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = {} if force else load_manifest(out_dir)
+    root = source_root(source)
+    tasks, stamps, skipped = [], {}, 0
+    for src in find_images(source):
+        key = os.path.abspath(src)
+        dst = os.path.join(out_dir, os.path.relpath(src, root))
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        stamp = _stamp(src, limit, draft, quality)
+        if manifest.get(key) == stamp and os.path.exists(dst):
+            skipped += 1
+            continue
+        stamps[key] = stamp
+        tasks.append((src, dst, limit, draft, quality))
+
+    summary = {"cropped": 0, "skipped": skipped, "failed": 0, "bytes": 0, "errors": {}}
+    start = time.perf_counter()
+    if tasks:
+        workers = min(workers or os.cpu_count() or 1, len(tasks))
+        with multiprocessing.Pool(workers) as pool:
+            chunksize = max(1, len(tasks) // (workers * 8))
+            for src, written, error in pool.imap_unordered(_crop_task, tasks, chunksize):
+                if error:
+                    summary["failed"] += 1
+                    summary["errors"][src] = error
+                    continue
+                summary["cropped"] += 1
+                summary["bytes"] += written
+                manifest[os.path.abspath(src)] = stamps[os.path.abspath(src)]
+        save_manifest(out_dir, manifest)
+    summary["seconds"] = time.perf_counter() - start
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("source", help="directory or glob pattern (quote it)")
+    parser.add_argument("out_dir")
+    parser.add_argument("--limit", type=int, default=1024, help="side of the square crop")
+    parser.add_argument("--draft", action="store_true",
+                        help="decode big JPEGs at reduced scale (wider field of view)")
+    parser.add_argument("--quality", type=int, default=90, help="JPEG/WebP quality")
+    parser.add_argument("--workers", type=int, help="processes (default: all CPUs)")
+    parser.add_argument("--force", action="store_true", help="ignore the manifest, redo everything")
+    args = parser.parse_args()
+
+    summary = crop_batch(args.source, args.out_dir, args.limit, args.draft,
+                         args.quality, args.workers, args.force)
+    for src, error in sorted(summary["errors"].items()):
+        print(f"failed: {src}: {error}")
+    seconds = summary["seconds"]
+    own, workers = peak_rss_mib()
+    print(f"cropped {summary['cropped']}, skipped {summary['skipped']} (up to date), "
+          f"failed {summary['failed']}")
+    print(f"{summary['cropped'] / max(seconds, 1e-9):.1f} images/s "
+          f"({seconds:.2f} s, {summary['bytes'] / 2**20:.1f} MiB written)")
+    print(f"peak RSS: {own:.1f} MiB main process, {workers:.1f} MiB largest worker")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Content-addressed cache of encoded crops made with bug.limit_img_size.
+
+A crop is keyed by the SHA-256 of the source file's bytes plus the crop
+parameters (limit, format, quality), so renaming or copying a source does
+not miss and editing it does not serve a stale crop. The source is hashed by
+streaming it in chunks, and the digest is remembered per (path, mtime, size),
+so a repeated request does not even re-read the file (the last digest_items
+stamps are kept).
+
+Two levels:
+    memory  an LRU of the most recent encoded crops (memory_items entries)
+    disk    one file per crop under the cache directory, capped at max_bytes;
+            the least recently used files are evicted first (a disk hit
+            refreshes the file's mtime, which is what the LRU order is rebuilt
+            from; memory hits only reorder it in this process)
+
+    python crop_cache.py roger_waters.jpg --limit 512 256 128 --repeat 50
+"""
+import argparse
+import hashlib
+import io
+import os
+import time
+from collections import OrderedDict
+
+from PIL import Image
+
+from bug import limit_img_size
+
+HASH_CHUNK = 1 << 20
+
+
+def file_digest(path, chunk_size=HASH_CHUNK):
+    """Hex SHA-256 of a file, read chunk_size bytes at a time."""
+    h = hashlib.sha256()
+    buf = bytearray(chunk_size)
+    view = memoryview(buf)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            h.update(view[:n])
+    return h.hexdigest()
+
+
+def encode_crop(path, limit, fmt=None, quality=90):
+    """Decode path, crop it and return the encoded bytes."""
+    with Image.open(path) as img:
+        fmt = fmt or img.format
+        cropped = limit_img_size(img, limit)
+        if fmt == "JPEG" and cropped.mode not in ("RGB", "L", "CMYK"):
+            cropped = cropped.convert("RGB")
+        out = io.BytesIO()
+        options = {"quality": quality} if fmt in ("JPEG", "WEBP") else {}
+        cropped.save(out, format=fmt, **options)
+    return out.getvalue()
+
+
+class CropCache:
+    """Encoded crops by (source content, crop parameters), in memory and on disk."""
+
+    def __init__(self, directory, max_bytes=256 << 20, memory_items=128, digest_items=4096):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        self.digest_items = digest_items
+        self._memory = OrderedDict()   # key -> bytes
+        self._disk = OrderedDict()     # key -> size, least recently used first
+        self._digests = OrderedDict()  # (path, mtime_ns, size) -> digest
+        self.disk_bytes = 0
+        self.counters = dict.fromkeys(
+            ("memory_hits", "disk_hits", "misses", "evictions", "bytes_hashed"), 0)
+        os.makedirs(directory, exist_ok=True)
+        self._scan()
+
+    def _scan(self):
+        """Rebuild the disk LRU order from the files' mtimes."""
+        entries = []
+        for sub in os.scandir(self.directory):
+            if not sub.is_dir():
+                continue
+            for entry in os.scandir(sub.path):
+                if entry.name.endswith(".crop"):
+                    st = entry.stat()
+                    entries.append((st.st_mtime_ns, entry.name[:-len(".crop")], st.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self.disk_bytes += size
+        self._evict()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".crop")
+
+    def digest(self, path):
+        """Content digest of path, recomputed only when its mtime or size changes."""
+        st = os.stat(path)
+        stamp = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+        digest = self._digests.get(stamp)
+        if digest is not None:
+            self._digests.move_to_end(stamp)
+            return digest
+        digest = self._digests[stamp] = file_digest(path)
+        self.counters["bytes_hashed"] += st.st_size
+        while len(self._digests) > self.digest_items:
+            self._digests.popitem(last=False)
+        return digest
+
+    @staticmethod
+    def key(digest, limit, fmt, quality):
+        params = f"{digest}:{limit}:{fmt or ''}:{quality}"
+        return hashlib.sha256(params.encode("ascii")).hexdigest()
+
+    def get(self, path, limit=1024, fmt=None, quality=90):
+        """Encoded crop of path; decodes the source only on a miss."""
+        key = self.key(self.digest(path), limit, fmt, quality)
+
+        data = self._memory.get(key)
+        if data is not None:
+            self._memory.move_to_end(key)
+            if key in self._disk:
+                self._disk.move_to_end(key)  # the file's mtime is left for disk hits
+            self.counters["memory_hits"] += 1
+            return data
+
+        if key in self._disk:
+            try:
+                with open(self._path(key), "rb") as f:
+                    data = f.read()
+            except FileNotFoundError:  # removed behind our back
+                self.disk_bytes -= self._disk.pop(key)
+            else:
+                self._touch(key)
+                self.counters["disk_hits"] += 1
+                self._remember(key, data)
+                return data
+
+        self.counters["misses"] += 1
+        data = encode_crop(path, limit, fmt, quality)
+        self._store(key, data)
+        self._remember(key, data)
+        return data
+
+    def _remember(self, key, data):
+        self._memory[key] = data
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _touch(self, key):
+        if key in self._disk:
+            self._disk.move_to_end(key)
+            try:
+                os.utime(self._path(key))
+            except FileNotFoundError:
+                self.disk_bytes -= self._disk.pop(key)
+
+    def _store(self, key, data):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        self.disk_bytes += len(data) - self._disk.pop(key, 0)
+        self._disk[key] = len(data)
+        self._evict()
+
+    def _evict(self):
+        while self.disk_bytes > self.max_bytes and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self.disk_bytes -= size
+            self._memory.pop(key, None)
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+            self.counters["evictions"] += 1
+
+    def stats(self):
+        requests = self.counters["memory_hits"] + self.counters["disk_hits"] + self.counters["misses"]
+        hits = requests - self.counters["misses"]
+        return dict(self.counters, requests=requests,
+                    hit_rate=round(hits / requests, 4) if requests else 0.0,
+                    disk_entries=len(self._disk), disk_bytes=self.disk_bytes,
+                    memory_entries=len(self._memory))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("images", nargs="+")
+    parser.add_argument("--limit", type=int, nargs="+", default=[1024])
+    parser.add_argument("--format", help="output format (default: the source's)")
+    parser.add_argument("--quality", type=int, default=90)
+    parser.add_argument("--cache-dir", default=".crop_cache")
+    parser.add_argument("--max-mib", type=float, default=256)
+    parser.add_argument("--memory-items", type=int, default=128)
+    parser.add_argument("--repeat", type=int, default=1, help="ask for every crop this many times")
+    args = parser.parse_args()
+
+    cache = CropCache(args.cache_dir, int(args.max_mib * 2**20), args.memory_items)
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for path in args.images:
+            for limit in args.limit:
+                cache.get(path, limit, args.format, args.quality)
+    elapsed = time.perf_counter() - start
+    stats = cache.stats()
+    for name, value in stats.items():
+        print(f"{name}: {value}")
+    print(f"{stats['requests'] / max(elapsed, 1e-9):,.0f} requests/s ({elapsed:.3f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Duplicate detection for organize-downloads.py.
+
+Files are narrowed down in three rounds, each reading more than the last but
+on fewer files:
+
+    1. size     files with a size nobody else has cannot be duplicates (stat only)
+    2. edges    SHA-256 of the first and last EDGE_BYTES; files smaller than
+                2 * EDGE_BYTES are fully read here and need no third round
+    3. middle   streamed SHA-256 of the rest of the file, between the edges,
+                only for what is left (the edges already matched in round 2)
+
+Rounds 2 and 3 run on a thread pool (hashlib releases the GIL on big
+buffers). Paths that already share an inode (hard links) count as one file.
+
+Policies for each group of duplicates, keeping one file:
+    report  only report them
+    link    replace the others with hard links to the kept file
+    remove  delete the others
+"""
+import hashlib
+import os
+import re
+import stat
+from concurrent.futures import ThreadPoolExecutor
+
+EDGE_BYTES = 64 * 1024
+READ_CHUNK = 1 << 20
+POLICIES = ("report", "link", "remove")
+
+# "nome (1).pdf" and the like: the copies a browser makes on re-download.
+_COPY_SUFFIX = re.compile(r" \(\d+\)$")
+
+
+def _edge_hash(path, size):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        if size <= 2 * EDGE_BYTES:
+            h.update(f.read())
+        else:
+            h.update(f.read(EDGE_BYTES))
+            f.seek(size - EDGE_BYTES)
+            h.update(f.read(EDGE_BYTES))
+    return h.digest()
+
+
+def _middle_hash(path, size):
+    h = hashlib.sha256()
+    buf = bytearray(READ_CHUNK)
+    view = memoryview(buf)
+    left = size - 2 * EDGE_BYTES
+    with open(path, "rb", buffering=0) as f:
+        f.seek(EDGE_BYTES)
+        while left > 0:
+            n = f.readinto(view[:min(left, READ_CHUNK)])
+            if not n:
+                break  # shrank since the stat: the digest will not match the others
+            h.update(view[:n])
+            left -= n
+    return h.digest()
+
+
+def _regroup(groups, key, workers):
+    """Split every group by key(path, size), in parallel; drop singletons."""
+    jobs = [(path, size) for size, paths in groups for path in paths]
+    with ThreadPoolExecutor(workers) as pool:
+        keys = list(pool.map(lambda job: key(*job), jobs))
+    buckets = {}
+    for (path, size), k in zip(jobs, keys):
+        buckets.setdefault((size, k), []).append(path)
+    return [(size, paths) for (size, _), paths in buckets.items() if len(paths) > 1]
+
+
+def _keeper_order(path):
+    # Keep the original over "x (1).ext" copies, then the shorter, then the older.
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return (bool(_COPY_SUFFIX.search(stem)), len(path), os.stat(path).st_mtime_ns, path)
+
+
+def find_duplicates(paths, workers=4):
+    """
+    Groups of paths with identical content (each sorted with the file to keep
+    first) and stats: files, bytes_scanned (their total size), bytes_hashed
+    (what was actually read) and wasted_bytes (size of the redundant copies).
+    """
+    by_size = {}
+    inodes = set()
+    scanned = 0
+    for path in paths:
+        st = os.lstat(path)
+        if not stat.S_ISREG(st.st_mode) or st.st_size == 0:
+            continue
+        if (st.st_dev, st.st_ino) in inodes:
+            continue
+        inodes.add((st.st_dev, st.st_ino))
+        scanned += st.st_size
+        by_size.setdefault(st.st_size, []).append(path)
+
+    groups = [(size, group) for size, group in by_size.items() if len(group) > 1]
+    hashed = sum(min(size, 2 * EDGE_BYTES) * len(group) for size, group in groups)
+    groups = _regroup(groups, _edge_hash, workers)
+    small = [g for g in groups if g[0] <= 2 * EDGE_BYTES]
+    large = [g for g in groups if g[0] > 2 * EDGE_BYTES]
+    hashed += sum((size - 2 * EDGE_BYTES) * len(group) for size, group in large)
+    large = _regroup(large, _middle_hash, workers)
+
+    result = [sorted(paths, key=_keeper_order) for _, paths in small + large]
+    result.sort()
+    stats = {
+        "files": len(inodes),
+        "bytes_scanned": scanned,
+        "bytes_hashed": hashed,
+        "wasted_bytes": sum(os.path.getsize(g[0]) * (len(g) - 1) for g in result),
+    }
+    return result, stats
+
+
+def apply_policy(groups, policy):
+    """Act on the duplicates (every path but the first of each group). Returns the errors."""
+    if policy not in POLICIES:
+        raise ValueError(f"unknown policy {policy!r}, expected one of {POLICIES}")
+    errors = []
+    if policy == "report":
+        return errors
+    for keep, *copies in groups:
+        for path in copies:
+            try:
+                if policy == "remove":
+                    os.unlink(path)
+                else:
+                    tmp = f"{path}.dedup-tmp"
+                    os.link(keep, tmp)
+                    os.replace(tmp, path)
+            except OSError as exc:
+                errors.append((path, str(exc)))
+    return errors
@@ -0,0 +1,162 @@
+"""
+Move backend for organize-downloads.py that also works across filesystems.
+
+On the same filesystem a move is a hard link plus unlink (never replaces an
+existing destination; falls back to rename where hard links are not
+supported). When the destination is on another mount (EXDEV, e.g. category
+folders on a NAS) the data is copied by the kernel, without passing through
+Python buffers, with os.copy_file_range or else os.sendfile. The copy is then
+fsync'ed, gets the source's permissions and timestamps, and only after that
+is the source unlinked. A failed copy leaves the source untouched and removes
+the partial destination.
+
+Copies can share a RateLimiter so that concurrent transfers together stay
+under a byte rate.
+"""
+import errno
+import os
+import shutil
+import threading
+import time
+
+COPY_CHUNK = 8 << 20
+
+
+class RateLimiter:
+    """Token bucket shared by threads: acquire(n) blocks until n bytes may pass."""
+
+    def __init__(self, bytes_per_second, burst=None):
+        self.rate = float(bytes_per_second)
+        self.capacity = float(burst or max(bytes_per_second, COPY_CHUNK))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, n):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= n
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+
+
+def _kernel_copy(fin, fout, size, limiter, chunk):
+    """
+    Copy size bytes between two file descriptors inside the kernel. Raises
+    OSError(ENOSYS) if neither syscall copies anything, for a plain copy.
+    """
+    copy = getattr(os, "copy_file_range", None)
+    copied = 0
+    while copied < size:
+        n = min(chunk, size - copied)
+        if limiter:
+            limiter.acquire(n)
+        sent = 0
+        if copy is not None:
+            try:
+                sent = copy(fin, fout, n)
+            except OSError as exc:
+                # Old kernels refuse copies between different filesystems.
+                if exc.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP):
+                    raise
+                copy = None
+            if sent == 0 and copied == 0:
+                copy = None  # some filesystems answer 0 instead of an error
+        if copy is None:
+            sent = os.sendfile(fout, fin, None, n)
+            if sent == 0 and copied == 0:
+                raise OSError(errno.ENOSYS, "the kernel copied nothing")
+        if sent == 0:
+            break  # the file shrank while we were copying
+        copied += sent
+    return copied
+
+
+def copy_across(src, dst, limiter=None, chunk=COPY_CHUNK):
+    """
+    Copy src into a new file dst (FileExistsError if it exists), durably and
+    with the source's metadata. Returns the number of bytes copied.
+    """
+    fin = os.open(src, os.O_RDONLY)
+    try:
+        st = os.fstat(fin)
+        fout = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_EXCL, st.st_mode & 0o777)
+        try:
+            try:
+                copied = _kernel_copy(fin, fout, st.st_size, limiter, chunk)
+            except OSError as exc:
+                if exc.errno not in (errno.EINVAL, errno.ENOSYS):
+                    raise
+                # Neither syscall works for this pair of files: plain reads.
+                os.lseek(fin, 0, os.SEEK_SET)
+                os.lseek(fout, 0, os.SEEK_SET)
+                copied = 0
+                while True:
+                    data = os.read(fin, chunk)
+                    if not data:
+                        break
+                    if limiter:
+                        limiter.acquire(len(data))
+                    os.write(fout, data)
+                    copied += len(data)
+            if copied != st.st_size or os.fstat(fin).st_size != st.st_size:
+                # Changed while we copied: keep the source, drop the copy.
+                raise OSError(errno.EIO, f"copied {copied} of {st.st_size} bytes", src)
+            os.fsync(fout)
+        except BaseException:
+            os.close(fout)
+            os.unlink(dst)
+            raise
+        os.close(fout)
+    finally:
+        os.close(fin)
+    shutil.copystat(src, dst)
+    return copied
+
+
+def _fsync_dir(path):
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def move(src, dst, limiter=None):
+    """
+    Move src to dst without ever replacing an existing dst (FileExistsError).
+    Returns (method, bytes copied): ("link", 0), ("rename", 0) or ("copy", n).
+    """
+    try:
+        os.link(src, dst, follow_symlinks=False)
+    except FileExistsError:
+        raise
+    except OSError as exc:
+        if exc.errno != errno.EXDEV:
+            # No hard links here (FAT, some network mounts): check, then rename.
+            if os.path.lexists(dst):
+                raise FileExistsError(errno.EEXIST, "File exists", dst)
+            try:
+                os.rename(src, dst)
+                return "rename", 0
+            except OSError as exc2:
+                if exc2.errno != errno.EXDEV:
+                    raise
+        if os.path.islink(src):
+            os.symlink(os.readlink(src), dst)
+            os.unlink(src)
+            return "copy", 0
+        copied = copy_across(src, dst, limiter)
+        _fsync_dir(os.path.dirname(dst) or ".")
+        os.unlink(src)
+        return "copy", copied
+    os.unlink(src)
+    return "link", 0
@@ -0,0 +1,293 @@
+"""
+Watch mode for organize-downloads.py.
+
+Instead of re-scanning the watched folders on every run, a long-running
+watcher waits for the kernel to report new files (inotify, through ctypes)
+and hands each one to the organizer once it is finished. Where inotify is
+not available it falls back to polling, and even then a folder is only
+listed again when its mtime changed.
+
+A file is "finished" when it has no partial-download suffix (.crdownload,
+.part, ...) and its size and mtime have not changed for `stable` seconds.
+While nothing is pending the watcher blocks without a timeout, so an idle
+watcher uses no CPU.
+
+State lives in a small SQLite index: files still waiting to settle, files
+already handled (including failures, so a file that cannot be moved is not
+retried until it changes) and each folder's mtime when it was last fully
+processed. After a restart a folder whose mtime did not change is not
+scanned at all.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import sqlite3
+import stat
+import struct
+import time
+
+PARTIAL_SUFFIXES = (".crdownload", ".part", ".partial", ".download", ".opdownload", ".tmp")
+
+STABLE_SECONDS = 2.0
+POLL_INTERVAL = 5.0
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+_EVENT = struct.Struct("iIII")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS folders (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pending (
+    path TEXT PRIMARY KEY,
+    folder TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS processed (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    destination TEXT,
+    error TEXT,
+    handled_at REAL NOT NULL
+);
+"""
+
+
+class Index:
+    """SQLite record of the watcher's progress."""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def folder_mtime(self, folder):
+        row = self.conn.execute("SELECT mtime_ns FROM folders WHERE path = ?", (folder,)).fetchone()
+        return row[0] if row else None
+
+    def set_folder_mtime(self, folder, mtime_ns):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO folders VALUES (?, ?)", (folder, mtime_ns))
+
+    def pending(self, folder):
+        return [path for (path,) in
+                self.conn.execute("SELECT path FROM pending WHERE folder = ?", (folder,))]
+
+    def add_pending(self, paths, folder):
+        with self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO pending VALUES (?, ?)",
+                                  [(path, folder) for path in paths])
+
+    def drop_pending(self, path):
+        with self.conn:
+            self.conn.execute("DELETE FROM pending WHERE path = ?", (path,))
+
+    def already_handled(self, path, st):
+        row = self.conn.execute("SELECT size, mtime_ns FROM processed WHERE path = ?",
+                                (path,)).fetchone()
+        return row is not None and row == (st.st_size, st.st_mtime_ns)
+
+    def record(self, path, st, destination=None, error=None):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO processed VALUES (?, ?, ?, ?, ?, ?)",
+                              (path, st.st_size, st.st_mtime_ns, destination, error, time.time()))
+            self.conn.execute("DELETE FROM pending WHERE path = ?", (path,))
+
+    def close(self):
+        self.conn.close()
+
+
+def is_candidate(name):
+    return not name.endswith(PARTIAL_SUFFIXES)
+
+
+class Inotify:
+    """Minimal inotify(7) binding: new or finished files in the watched folders."""
+
+    MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library("c")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+        self._libc = libc
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._folders = {}
+        self._poll = select.poll()
+        self._poll.register(self.fd, select.POLLIN)
+
+    def add(self, folder):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(folder), self.MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {folder}")
+        self._folders[wd] = folder
+
+    def wait(self, timeout):
+        """
+        Block up to timeout seconds (forever for None). Returns a list of
+        (folder, name) pairs, or None if the kernel queue overflowed and the
+        folders must be rescanned.
+        """
+        if not self._poll.poll(None if timeout is None else int(timeout * 1000)):
+            return []
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return events
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, length = _EVENT.unpack_from(data, offset)
+                offset += _EVENT.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    return None
+                if mask & IN_ISDIR or wd not in self._folders:
+                    continue
+                events.append((self._folders[wd], os.fsdecode(name)))
+
+    def close(self):
+        os.close(self.fd)
+
+
+class Poller:
+    """Fallback: list a folder again only when its mtime changes."""
+
+    def __init__(self, interval=POLL_INTERVAL):
+        self.interval = interval
+        self._mtimes = {}
+
+    def add(self, folder):
+        self._mtimes[folder] = os.stat(folder).st_mtime_ns
+
+    def wait(self, timeout):
+        time.sleep(self.interval if timeout is None else min(timeout, self.interval))
+        events = []
+        for folder, seen in self._mtimes.items():
+            mtime = os.stat(folder).st_mtime_ns
+            if mtime != seen:
+                self._mtimes[folder] = mtime
+                with os.scandir(folder) as it:
+                    events.extend((folder, entry.name) for entry in it)
+        return events
+
+    def close(self):
+        pass
+
+
+def _scan(folder):
+    with os.scandir(folder) as it:
+        return [entry.path for entry in it if entry.is_file() and is_candidate(entry.name)]
+
+
+class Watcher:
+    """
+    Calls process(folder, name) for every finished file that shows up in the
+    folders. process returns the destination path; OSError is recorded as a
+    failure.
+    """
+
+    def __init__(self, folders, process, index, stable=STABLE_SECONDS, source=None,
+                 clock=time.monotonic, log=print):
+        self.folders = [os.path.abspath(os.fspath(folder)) for folder in folders]
+        self.process = process
+        self.index = index
+        self.stable = stable
+        self.clock = clock
+        self.log = log
+        self.source = source
+        self.pending = {}  # path -> (folder, size, mtime_ns, unchanged since)
+        self.handled = 0
+
+    def _open_source(self):
+        if self.source is None:
+            try:
+                self.source = Inotify()
+            except OSError as exc:
+                self.log(f"inotify unavailable ({exc}); polling every {POLL_INTERVAL:g}s")
+                self.source = Poller()
+        for folder in self.folders:
+            self.source.add(folder)
+
+    def _queue(self, folder, paths):
+        fresh = [path for path in paths if path not in self.pending]
+        for path in fresh:
+            self.pending[path] = (folder, -1, -1, self.clock())
+        self.index.add_pending(fresh, folder)
+
+    def _startup(self):
+        for folder in self.folders:
+            mtime = os.stat(folder).st_mtime_ns
+            if mtime == self.index.folder_mtime(folder):
+                # Nothing arrived while we were down: resume from the index.
+                self._queue(folder, self.index.pending(folder))
+            else:
+                self._queue(folder, _scan(folder))
+
+    def _settle(self):
+        """Handle the pending files that stopped changing; returns how many are left."""
+        now = self.clock()
+        touched = set()
+        for path, (folder, size, mtime, since) in list(self.pending.items()):
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                st = None
+            if st is None or not stat.S_ISREG(st.st_mode):
+                del self.pending[path]
+                self.index.drop_pending(path)
+                continue
+            if (st.st_size, st.st_mtime_ns) != (size, mtime):
+                self.pending[path] = (folder, st.st_size, st.st_mtime_ns, now)
+                continue
+            if now - since < self.stable:
+                continue
+            del self.pending[path]
+            touched.add(folder)
+            if self.index.already_handled(path, st):
+                self.index.drop_pending(path)
+                continue
+            try:
+                destination = self.process(folder, os.path.basename(path))
+            except OSError as exc:
+                self.index.record(path, st, error=str(exc))
+                self.log(f"Erro: {path} {exc}")
+                continue
+            self.index.record(path, st, destination=destination)
+            self.handled += 1
+        for folder in touched:
+            if not any(entry[0] == folder for entry in self.pending.values()):
+                self.index.set_folder_mtime(folder, os.stat(folder).st_mtime_ns)
+        return len(self.pending)
+
+    def run(self, until=None):
+        """Watch until interrupted (or until the until() callback returns True)."""
+        self._open_source()
+        self._startup()
+        try:
+            while until is None or not until():
+                left = self._settle()
+                # Idle: block until the kernel has something. Otherwise wake up
+                # in time to see whether the pending files have settled.
+                events = self.source.wait(self.stable / 2 if left else None)
+                if events is None:
+                    for folder in self.folders:
+                        self._queue(folder, _scan(folder))
+                    continue
+                for folder, name in events:
+                    if is_candidate(name):
+                        self._queue(folder, [os.path.join(folder, name)])
+        finally:
+            self.source.close()
@@ -1,14 +1,12 @@
 import getpass
 import random
 
+from jokenpo_engine import CODIGOS, EMPATE, RESULTADO, VIT_JOGADOR1, VIT_JOGADOR2
+
 """
 Training rawest GUI to make the game a lil more interesting
 """
 
-EMPATE = 0
-VIT_JOGADOR1 = 1
-VIT_JOGADOR2 = 2
-
 ESCOLHAS_VALIDAS = ['pedra', 'papel', 'tesoura']
 
 def pre_processar_resposta(escolha):
@@ -27,25 +25,24 @@ def solicitar_escolhas(num_jogadores):
 def jokenpo(jogador1, jogador2):
     if jogador1 == jogador2:
         return EMPATE
-    elif ((jogador1 == 'pedra' and jogador2 == 'tesoura') or
-        (jogador1 == 'tesoura' and jogador2 == 'papel') or
-        (jogador1 == 'papel' and jogador2 == 'pedra')):
-        return VIT_JOGADOR1
-    else:
+    if jogador1 not in CODIGOS or jogador2 not in CODIGOS:
+        # escolha inválida perde para o jogador 2, como sempre foi
         return VIT_JOGADOR2
-
-num_jogadores = int(input("Número de jogadores (1 ou 2): "))
-
-escolhas = solicitar_escolhas(num_jogadores)
-resultado = jokenpo(escolhas[0], escolhas[1])
-
-print("\n-----------: ")
-for i, escolha in enumerate(escolhas):
-    print(f"Jogador {i+1 if (i == 0) or (num_jogadores == 2) else 'CPU'}: {escolha}.")   
-print("\nRESULTADO: ")
-if resultado == EMPATE:
-    print("Empate")
-elif resultado == VIT_JOGADOR1:
-    print("JOGADOR 1 venceu!")
-else:
-    print(f"JOGADOR {'2' if num_jogadores == 2 else 'CPU'} venceu!")
+    return int(RESULTADO[CODIGOS[jogador1], CODIGOS[jogador2]])
+
+if __name__ == '__main__':
+    num_jogadores = int(input("Número de jogadores (1 ou 2): "))
+
+    escolhas = solicitar_escolhas(num_jogadores)
+    resultado = jokenpo(escolhas[0], escolhas[1])
+
+    print("\n-----------: ")
+    for i, escolha in enumerate(escolhas):
+        print(f"Jogador {i+1 if (i == 0) or (num_jogadores == 2) else 'CPU'}: {escolha}.")
+    print("\nRESULTADO: ")
+    if resultado == EMPATE:
+        print("Empate")
+    elif resultado == VIT_JOGADOR1:
+        print("JOGADOR 1 venceu!")
+    else:
+        print(f"JOGADOR {'2' if num_jogadores == 2 else 'CPU'} venceu!")
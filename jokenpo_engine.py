@@ -0,0 +1,220 @@
+"""
+Motor do jokenpo: jogadas como inteiros e resultado por matriz.
+
+    PEDRA = 0, PAPEL = 1, TESOURA = 2
+    RESULTADO[j1, j2] -> EMPATE, VIT_JOGADOR1 ou VIT_JOGADOR2
+
+Com NumPy, RESULTADO[j1, j2] resolve arrays inteiros de jogos de uma vez.
+Uma partida entre duas estratégias roda `linhas` disputas independentes em
+paralelo (vetorizadas) por `rodadas` rodadas; estratégias que aprendem com o
+adversário (frequência, Markov) veem só o histórico da própria linha.
+
+    python jokenpo_engine.py --linhas 10000 --rodadas 100
+"""
+import abc
+import argparse
+import itertools
+import time
+
+import numpy as np
+
+EMPATE = 0
+VIT_JOGADOR1 = 1
+VIT_JOGADOR2 = 2
+
+PEDRA, PAPEL, TESOURA = range(3)
+ESCOLHAS = ('pedra', 'papel', 'tesoura')
+CODIGOS = {nome: i for i, nome in enumerate(ESCOLHAS)}
+
+# VENCE[x] é a jogada que ganha de x
+VENCE = np.array([PAPEL, TESOURA, PEDRA], dtype=np.int8)
+
+# RESULTADO[j1, j2]: quem ganha quando o jogador 1 joga j1 e o 2 joga j2
+RESULTADO = np.full((3, 3), VIT_JOGADOR2, dtype=np.int8)
+RESULTADO[np.arange(3), np.arange(3)] = EMPATE
+RESULTADO[VENCE, np.arange(3)] = VIT_JOGADOR1
+
+# PAYOFF[j1, j2]: +1 vitória, 0 empate, -1 derrota, do ponto de vista do jogador 1
+PAYOFF = np.select([RESULTADO == VIT_JOGADOR1, RESULTADO == VIT_JOGADOR2], [1, -1], 0).astype(np.int8)
+
+
+def codificar(nome):
+    return CODIGOS[nome.lower().strip()]
+
+
+def resolver(j1, j2):
+    """Resultado de um jogo (ints) ou de muitos (arrays de jogadas)."""
+    return RESULTADO[j1, j2]
+
+
+# -- estratégias ---------------------------------------------------------------
+#
+# Cada estratégia joga `linhas` jogos por rodada: jogar() devolve um array de
+# jogadas e observar() recebe o que cada adversário jogou. Estratégias que não
+# dependem do adversário (adaptativa = False) podem gerar todas as rodadas de
+# uma vez com jogar_tudo().
+
+class Estrategia(abc.ABC):
+    adaptativa = False
+
+    def iniciar(self, linhas, rng):
+        self.linhas = linhas
+        self.rng = rng
+
+    @abc.abstractmethod
+    def jogar(self):
+        """Um array de `linhas` jogadas para a próxima rodada."""
+
+    def jogar_tudo(self, rodadas):
+        return np.stack([self.jogar() for _ in range(rodadas)], axis=1)
+
+    def observar(self, deles):
+        pass
+
+
+class Aleatoria(Estrategia):
+    """Pedra, papel ou tesoura com a mesma chance."""
+
+    def jogar(self):
+        return self.rng.integers(0, 3, self.linhas, dtype=np.int8)
+
+    def jogar_tudo(self, rodadas):
+        return self.rng.integers(0, 3, (self.linhas, rodadas), dtype=np.int8)
+
+
+class Enviesada(Estrategia):
+    """Sorteia com pesos fixos (pedra, papel, tesoura)."""
+
+    def __init__(self, pesos=(0.5, 0.3, 0.2)):
+        pesos = np.asarray(pesos, dtype=float)
+        self.acumulado = np.cumsum(pesos / pesos.sum())
+
+    def jogar(self):
+        return self.jogar_tudo(1)[:, 0]
+
+    def jogar_tudo(self, rodadas):
+        sorteio = self.rng.random((self.linhas, rodadas))
+        return np.searchsorted(self.acumulado, sorteio, side="right").clip(0, 2).astype(np.int8)
+
+
+class Frequencia(Estrategia):
+    """Joga o que vence a jogada mais frequente do adversário até agora."""
+
+    adaptativa = True
+
+    def iniciar(self, linhas, rng):
+        super().iniciar(linhas, rng)
+        self.contagem = np.zeros((linhas, 3), dtype=np.int32)
+        self._linhas = np.arange(linhas)
+
+    def jogar(self):
+        # ruído < 1 só desempata, sem mudar a ordem das contagens
+        previsto = np.argmax(self.contagem + self.rng.random((self.linhas, 3)), axis=1)
+        return VENCE[previsto]
+
+    def observar(self, deles):
+        self.contagem[self._linhas, deles] += 1
+
+
+class Markov(Estrategia):
+    """
+    Conta as transições do adversário (jogada anterior -> próxima) e joga o
+    que vence a próxima jogada mais provável.
+    """
+
+    adaptativa = True
+
+    def iniciar(self, linhas, rng):
+        super().iniciar(linhas, rng)
+        self.transicoes = np.zeros((linhas, 3, 3), dtype=np.int32)
+        self.anterior = None
+        self._linhas = np.arange(linhas)
+
+    def jogar(self):
+        if self.anterior is None:
+            return self.rng.integers(0, 3, self.linhas, dtype=np.int8)
+        linha = self.transicoes[self._linhas, self.anterior]
+        previsto = np.argmax(linha + self.rng.random((self.linhas, 3)), axis=1)
+        return VENCE[previsto]
+
+    def observar(self, deles):
+        if self.anterior is not None:
+            self.transicoes[self._linhas, self.anterior, deles] += 1
+        self.anterior = deles
+
+
+ESTRATEGIAS = {
+    "aleatoria": Aleatoria,
+    "enviesada": Enviesada,
+    "frequencia": Frequencia,
+    "markov": Markov,
+}
+
+
+# -- partidas e torneio --------------------------------------------------------
+
+def partida(estrategia1, estrategia2, linhas=10_000, rodadas=100, rng=None):
+    """
+    linhas * rodadas jogos entre duas estratégias (instâncias novas).
+    Devolve as contagens [empates, vitórias do 1, vitórias do 2].
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    estrategia1.iniciar(linhas, rng)
+    estrategia2.iniciar(linhas, rng)
+    if not (estrategia1.adaptativa or estrategia2.adaptativa):
+        resultados = RESULTADO[estrategia1.jogar_tudo(rodadas), estrategia2.jogar_tudo(rodadas)]
+        return np.bincount(resultados.ravel(), minlength=3)
+    contagem = np.zeros(3, dtype=np.int64)
+    for _ in range(rodadas):
+        j1, j2 = estrategia1.jogar(), estrategia2.jogar()
+        contagem += np.bincount(RESULTADO[j1, j2], minlength=3)
+        estrategia1.observar(j2)
+        estrategia2.observar(j1)
+    return contagem
+
+
+def torneio(estrategias=None, linhas=10_000, rodadas=100, seed=None):
+    """
+    Todos contra todos. estrategias: {nome: fábrica sem argumentos}.
+    Devolve (nomes, taxa de vitória[i, j] de i contra j, total de jogos).
+    """
+    estrategias = estrategias or ESTRATEGIAS
+    nomes = list(estrategias)
+    rng = np.random.default_rng(seed)
+    taxa = np.full((len(nomes), len(nomes)), np.nan)
+    jogos = 0
+    for i, j in itertools.combinations(range(len(nomes)), 2):
+        empates, v1, v2 = partida(estrategias[nomes[i]](), estrategias[nomes[j]](),
+                                  linhas, rodadas, rng)
+        total = empates + v1 + v2
+        taxa[i, j], taxa[j, i] = v1 / total, v2 / total
+        jogos += total
+    return nomes, taxa, jogos
+
+
+def tabela(nomes, taxa):
+    largura = max(len(nome) for nome in nomes) + 2
+    linhas = ["".ljust(largura) + "".join(nome.rjust(largura) for nome in nomes) + "média".rjust(largura)]
+    for nome, fila in zip(nomes, taxa):
+        celulas = "".join(("-" if np.isnan(x) else f"{x:.1%}").rjust(largura) for x in fila)
+        linhas.append(nome.ljust(largura) + celulas + f"{np.nanmean(fila):.1%}".rjust(largura))
+    return "\n".join(linhas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Torneio de estratégias de jokenpo.")
+    parser.add_argument("--linhas", type=int, default=10_000, help="jogos em paralelo por partida")
+    parser.add_argument("--rodadas", type=int, default=100)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    nomes, taxa, jogos = torneio(linhas=args.linhas, rodadas=args.rodadas, seed=args.seed)
+    segundos = time.perf_counter() - inicio
+    print("Taxa de vitória (linha contra coluna):")
+    print(tabela(nomes, taxa))
+    print(f"\n{jogos:,} jogos em {segundos:.2f} s ({jogos / segundos:,.0f} jogos/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark of json_logic_compiler against the interpreting json_logic package.
+
+Scores --records synthetic form records with the area rule (or a rule read
+from --rule) both ways, checks that every result agrees and prints records/s
+and the speedup. Compiling is timed separately, once cold and once from the
+rule cache.
+
+    python json_logic_bench.py --records 1e6
+    python json_logic_bench.py --rule rule.json --records 200000
+"""
+import argparse
+import json
+import random
+import time
+
+import json_logic_compiler
+
+try:
+    from json_logic import jsonLogic
+except ImportError:  # only the compiled side is measured
+    jsonLogic = None
+
+AREA = {"if": [
+    {"missing": ["formData.length", "formData.radius"]},
+    0,
+    {"*": [{"var": "formData.length"},
+           {"*": [{"var": "formData.radius"}, {"var": "formData.radius"}]},
+           3.14]},
+]}
+
+
+def make_records(n, seed=0):
+    """Form records, about one in ten missing a field."""
+    rng = random.Random(seed)
+    records = []
+    for _ in range(n):
+        form = {"length": rng.randint(1, 100), "radius": round(rng.uniform(0.5, 20), 2)}
+        if rng.random() < 0.1:
+            del form[rng.choice(("length", "radius"))]
+        records.append({"formData": form})
+    return records
+
+
+def timed(score, rule, records):
+    start = time.perf_counter()
+    results = [score(rule, record) for record in records]
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=float, default=2e5)
+    parser.add_argument("--rule", help="JSON file with the rule (default: the area formula)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rule = AREA
+    if args.rule:
+        with open(args.rule) as f:
+            rule = json.load(f)
+    records = make_records(int(args.records), args.seed)
+
+    json_logic_compiler.cache_clear()
+    start = time.perf_counter()
+    area = json_logic_compiler.compile_rule(rule)
+    cold = time.perf_counter() - start
+    start = time.perf_counter()
+    json_logic_compiler.compile_rule(rule)
+    warm = time.perf_counter() - start
+    print(f"compile: {cold * 1e6:,.0f} us, from cache: {warm * 1e6:,.1f} us")
+
+    compiled, seconds = timed(lambda _, record: area(record), rule, records)
+    print(f"{'evaluator':>12}{'seconds':>10}{'records/s':>14}")
+    print(f"{'compiled':>12}{seconds:>10.3f}{len(records) / seconds:>14,.0f}")
+    if jsonLogic is None:
+        print("json_logic is not installed: nothing to compare with")
+        return
+    interpreted, baseline = timed(jsonLogic, rule, records)
+    print(f"{'jsonLogic':>12}{baseline:>10.3f}{len(records) / baseline:>14,.0f}")
+    mismatches = sum(a != b for a, b in zip(compiled, interpreted))
+    print(f"\nspeedup {baseline / seconds:.1f}x, {mismatches} mismatching results")
+
+
+if __name__ == "__main__":
+    main()
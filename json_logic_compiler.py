@@ -0,0 +1,523 @@
+"""
+JsonLogic rules compiled once into Python closures.
+
+json_logic.jsonLogic(rule, data) walks the rule tree on every call. Here the
+tree is walked once: every node becomes a closure taking the record, `var`
+paths are split and turned into accessor functions up front, and sub-trees
+that do not depend on the record are evaluated at compile time. Evaluating a
+rule on a record is then one call:
+
+    area = compile_rule({"*": [{"var": "formData.length"}, 3.14]})
+    area({"formData": {"length": 2}})   # 6.28
+
+Results match json_logic.jsonLogic (the json-logic-qubit package: same
+operators, type coercions and missing-data rules), with two differences:
+custom operations registered with json_logic.add_operation are not known
+here, and the non-standard "count" operation does not warn.
+
+Compiled rules are kept in an LRU cache keyed by the rule's canonical JSON,
+so compiling the same rule again (even with its keys in another order) is a
+dictionary lookup.
+"""
+import copy
+import json
+import logging
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+RULE_CACHE_SIZE = 256
+
+_NO_ARGUMENT = object()
+
+
+# -- operations, with json_logic's semantics ----------------------------------
+
+def _is_numeric(arg):
+    return type(arg) in (int, float)
+
+
+def _to_numeric(arg):
+    if type(arg) is int:
+        return arg
+    if isinstance(arg, str) and '.' in arg:
+        arg = float(arg)
+    if isinstance(arg, float):
+        return int(arg) if arg.is_integer() else arg
+    return int(arg)
+
+
+def _equal_to(a, b):
+    if isinstance(a, str) or isinstance(b, str):
+        return str(a) == str(b)
+    if isinstance(a, bool) or isinstance(b, bool):
+        return bool(a) is bool(b)
+    return a == b
+
+
+def _strict_equal_to(a, b):
+    if type(a) is type(b):
+        return a == b
+    if _is_numeric(a) and _is_numeric(b):
+        return _to_numeric(a) == _to_numeric(b)
+    return False
+
+
+def _less_than(a, b, c=_NO_ARGUMENT):
+    if a is None or b is None:
+        return False
+    if _is_numeric(a) or _is_numeric(b):
+        try:
+            a, b = _to_numeric(a), _to_numeric(b)
+        except TypeError:
+            return False
+    return a < b and (c is _NO_ARGUMENT or _less_than(b, c))
+
+
+def _less_than_or_equal_to(a, b, c=_NO_ARGUMENT):
+    return ((_less_than(a, b) or _equal_to(a, b))
+            and (c is _NO_ARGUMENT or _less_than_or_equal_to(b, c)))
+
+
+def _log(a):
+    logger.info(a)
+    return a
+
+
+def _in(a, b):
+    if hasattr(b, '__contains__'):
+        return a in b
+    return False
+
+
+def _subtract(a, b=_NO_ARGUMENT):
+    if b is _NO_ARGUMENT:
+        return _to_numeric(-_to_numeric(a))
+    return _to_numeric(_to_numeric(a) - _to_numeric(b))
+
+
+def _multiply(*args):
+    total = 1
+    for arg in args:
+        total *= _to_numeric(arg)
+    return _to_numeric(total)
+
+
+def _merge(*args):
+    result = []
+    for arg in args:
+        if isinstance(arg, (list, tuple)):
+            result.extend(arg)
+        else:
+            result.append(arg)
+    return result
+
+
+def _method(obj, method, args=[]):
+    method = getattr(obj, str(method))
+    if callable(method):
+        return method(*args)
+    return method
+
+
+OPERATIONS = {
+    '==': _equal_to,
+    '===': _strict_equal_to,
+    '!=': lambda a, b: not _equal_to(a, b),
+    '!==': lambda a, b: not _strict_equal_to(a, b),
+    '>': lambda a, b: _less_than(b, a),
+    '>=': lambda a, b: _less_than_or_equal_to(b, a),
+    '<': _less_than,
+    '<=': _less_than_or_equal_to,
+    '!!': lambda a: bool(a),
+    '!': lambda a: not a,
+    'log': _log,
+    'in': _in,
+    'cat': lambda *args: "".join(str(arg) for arg in args),
+    'substr': lambda source, start, length=None: source[start:][:length],
+    '+': lambda *args: _to_numeric(sum(map(_to_numeric, args))),
+    '-': _subtract,
+    '*': _multiply,
+    '/': lambda a, b: _to_numeric(_to_numeric(a) / _to_numeric(b)),
+    '%': lambda a, b: _to_numeric(_to_numeric(a) % _to_numeric(b)),
+    'min': lambda *args: min(_to_numeric(arg) for arg in args) if args else None,
+    'max': lambda *args: max(_to_numeric(arg) for arg in args) if args else None,
+    'merge': _merge,
+    'method': _method,
+    'count': lambda *args: sum(1 if a else 0 for a in args),
+}
+
+# Never evaluated at compile time, even with constant arguments.
+_SIDE_EFFECTS = {'log', 'method'}
+
+
+# -- compiled nodes -----------------------------------------------------------
+#
+# A node compiles either to a _Const (its value does not depend on the record)
+# or to a function of the record. Records are normalized once (`data or {}`,
+# as jsonLogic does) where evaluation starts: the rule itself and the
+# per-element logic of map/filter/reduce/all/none/some. A list or dict
+# constant is copied on every call: the compiled rule is shared through the
+# cache and a caller that changes its result must not change the rule.
+
+class _Const:
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    @property
+    def mutable(self):
+        return isinstance(self.value, (list, dict))
+
+
+def _function(node):
+    if isinstance(node, _Const):
+        value = node.value
+        if node.mutable:
+            return lambda data: copy.deepcopy(value)
+        return lambda data: value
+    return node
+
+
+def _all_const(nodes):
+    return all(isinstance(node, _Const) for node in nodes)
+
+
+def _entry(logic):
+    """Compile logic that is evaluated against its own data (normalized here)."""
+    node = _function(_compile(logic))
+    return lambda data: node(data or {})
+
+
+def _is_logic(logic):
+    return isinstance(logic, dict) and len(logic) == 1
+
+
+def _compile(logic):
+    if isinstance(logic, (list, tuple)):
+        items = [_compile(item) for item in logic]
+        if _all_const(items):
+            return _Const([item.value for item in items])
+        fs = [_function(item) for item in items]
+        return lambda data: [f(data) for f in fs]
+    if not _is_logic(logic):
+        return _Const(logic)
+
+    op = next(iter(logic))
+    values = logic[op]
+    if not isinstance(values, (list, tuple)):
+        values = [values]
+
+    if op in ('if', '?:'):
+        return _compile_if([_compile(value) for value in values])
+    if op in ('and', 'or'):
+        return _compile_and_or(op == 'and', [_compile(value) for value in values])
+    if op in _SCOPED:
+        return _SCOPED[op](*values)
+
+    args = [_compile(value) for value in values]
+    if op == 'var':
+        return _compile_var(*args)
+    if op == 'missing':
+        return _compile_missing(args)
+    if op == 'missing_some':
+        return _compile_missing_some(*args)
+    if op not in OPERATIONS:
+        raise ValueError(f"Unrecognized operation {op!r}")
+    return _compile_operation(OPERATIONS[op], args, fold=op not in _SIDE_EFFECTS)
+
+
+def _compile_operation(func, args, fold=True):
+    if fold and _all_const(args):
+        try:
+            return _Const(func(*(arg.value for arg in args)))
+        except Exception:
+            pass  # e.g. a division by zero in a branch that may never run: fail at run time
+    fs = [_function(arg) for arg in args]
+    if len(fs) == 1:
+        a, = fs
+        return lambda data: func(a(data))
+    if len(fs) == 2:
+        a, b = fs
+        return lambda data: func(a(data), b(data))
+    return lambda data: func(*[f(data) for f in fs])
+
+
+# -- logical operations: only the branches needed are evaluated ---------------
+
+def _compile_if(args):
+    pairs = []
+    otherwise = None
+    for i in range(0, len(args) - 1, 2):
+        cond, then = args[i], args[i + 1]
+        if isinstance(cond, _Const):
+            if not cond.value:
+                continue
+            otherwise = then  # always taken once reached
+            break
+        pairs.append((cond, _function(then)))
+    if otherwise is None:
+        otherwise = args[-1] if len(args) % 2 else _Const(None)
+    if not pairs:
+        return otherwise
+    otherwise = _function(otherwise)
+
+    if len(pairs) == 1:
+        (cond, then), = pairs
+        return lambda data: then(data) if cond(data) else otherwise(data)
+
+    def if_(data):
+        for cond, then in pairs:
+            if cond(data):
+                return then(data)
+        return otherwise(data)
+    return if_
+
+
+def _compile_and_or(is_and, args):
+    remaining = []
+    for i, arg in enumerate(args):
+        if isinstance(arg, _Const):
+            if bool(arg.value) != is_and:
+                # A falsy constant ends an "and" (a truthy one ends an "or").
+                remaining.append(arg)
+                break
+            if i < len(args) - 1:
+                continue  # otherwise it only matters as the final value
+        remaining.append(arg)
+    if not remaining:
+        return _Const(False)
+    if len(remaining) == 1:
+        return remaining[0]
+    fs = [_function(arg) for arg in remaining]
+
+    if is_and:
+        def and_(data):
+            for f in fs:
+                current = f(data)
+                if not current:
+                    return current
+            return current
+        return and_
+
+    def or_(data):
+        for f in fs:
+            current = f(data)
+            if current:
+                return current
+        return current
+    return or_
+
+
+# -- data operations ----------------------------------------------------------
+
+def _accessor(var_name):
+    """Function data -> (found, value) following json_logic's var lookup."""
+    if var_name is None or var_name == '':
+        return lambda data: (True, data)
+    steps = []
+    for key in str(var_name).split('.'):
+        try:
+            steps.append((key, int(key)))
+        except ValueError:
+            steps.append((key, None))
+
+    if len(steps) == 1:
+        (key, index), = steps
+
+        def get(data):
+            try:
+                return True, data[key]
+            except KeyError:
+                return False, None
+            except TypeError:
+                if index is None:
+                    return False, None
+                try:
+                    return True, data[index]
+                except (KeyError, TypeError):
+                    return False, None
+        return get
+
+    def get(data):
+        try:
+            for key, index in steps:
+                try:
+                    data = data[key]
+                except TypeError:
+                    if index is None:
+                        return False, None
+                    data = data[index]
+        except (KeyError, TypeError):
+            return False, None
+        return True, data
+    return get
+
+
+def _var(data, var_name=None, default=None):
+    found, value = _accessor(var_name)(data)
+    return value if found else default
+
+
+def _compile_var(var_name=_Const(None), default=_Const(None)):
+    if not isinstance(var_name, _Const):
+        name_f, default_f = var_name, _function(default)
+        return lambda data: _var(data, name_f(data), default_f(data))
+
+    get = _accessor(var_name.value)
+    if isinstance(default, _Const) and not default.mutable:
+        default_value = default.value
+
+        def var(data):
+            found, value = get(data)
+            return value if found else default_value
+        return var
+
+    default = _function(default)
+
+    def var(data):
+        found, value = get(data)
+        return value if found else default(data)
+    return var
+
+
+def _missing_names(names):
+    if names and isinstance(names[0], (list, tuple)):
+        return names[0]
+    return names
+
+
+def _is_missing(value):
+    return value is None or value == ""
+
+
+def _compile_missing(args):
+    if not _all_const(args):
+        fs = [_function(arg) for arg in args]
+        return lambda data: [name for name in _missing_names([f(data) for f in fs])
+                             if _is_missing(_var(data, name))]
+    getters = [(name, _accessor(name)) for name in _missing_names([arg.value for arg in args])]
+
+    def missing(data):
+        result = []
+        for name, get in getters:
+            found, value = get(data)
+            if not found or _is_missing(value):
+                result.append(name)
+        return result
+    return missing
+
+
+def _compile_missing_some(need_count, names):
+    if not _all_const((need_count, names)):
+        need_f, names_f = _function(need_count), _function(names)
+        return lambda data: _compile_missing_some(_Const(need_f(data)), _Const(names_f(data)))(data)
+    need, names = need_count.value, names.value
+    missing = _compile_missing([_Const(names)])
+
+    def missing_some(data):
+        result = missing(data)
+        return [] if len(names) - len(result) >= need else result
+    return missing_some
+
+
+# -- scoped operations: logic applied to each element of an array -------------
+
+def _scoped(scoped_data, scoped_logic):
+    return _function(_compile(scoped_data)), _entry(scoped_logic)
+
+
+def _compile_filter(scoped_data, scoped_logic):
+    items, logic = _scoped(scoped_data, scoped_logic)
+
+    def filter_(data):
+        array = items(data)
+        if not isinstance(array, (list, tuple)):
+            return []
+        return [datum for datum in array if logic(datum)]
+    return filter_
+
+
+def _compile_map(scoped_data, scoped_logic):
+    items, logic = _scoped(scoped_data, scoped_logic)
+
+    def map_(data):
+        array = items(data)
+        if not isinstance(array, (list, tuple)):
+            return []
+        return [logic(datum) for datum in array]
+    return map_
+
+
+def _compile_reduce(scoped_data, scoped_logic, initial=None):
+    items, logic = _scoped(scoped_data, scoped_logic)
+    initial_f = _function(_compile(initial))
+
+    def reduce_(data):
+        array = items(data)
+        accumulator = initial_f(data)
+        if not isinstance(array, (list, tuple)):
+            return accumulator
+        for current in array:
+            accumulator = logic({'accumulator': accumulator, 'current': current})
+        return accumulator
+    return reduce_
+
+
+def _compile_all(scoped_data, scoped_logic):
+    items, logic = _scoped(scoped_data, scoped_logic)
+
+    def all_(data):
+        array = items(data)
+        if not isinstance(array, (list, tuple)) or not array:
+            return False
+        return all(logic(datum) for datum in array)
+    return all_
+
+
+def _compile_none(scoped_data, scoped_logic):
+    filter_ = _compile_filter(scoped_data, scoped_logic)
+    return lambda data: len(filter_(data)) == 0
+
+
+def _compile_some(scoped_data, scoped_logic):
+    filter_ = _compile_filter(scoped_data, scoped_logic)
+    return lambda data: len(filter_(data)) > 0
+
+
+_SCOPED = {
+    'filter': _compile_filter,
+    'map': _compile_map,
+    'reduce': _compile_reduce,
+    'all': _compile_all,
+    'none': _compile_none,
+    'some': _compile_some,
+}
+
+
+# -- public API -----------------------------------------------------------------
+
+def canonical(rule):
+    """The rule as canonical JSON: sorted keys, no whitespace."""
+    return json.dumps(rule, sort_keys=True, separators=(",", ":"))
+
+
+@lru_cache(maxsize=RULE_CACHE_SIZE)
+def _compile_canonical(key):
+    node = _entry(json.loads(key))
+    return lambda data=None: node(data)
+
+
+def compile_rule(rule):
+    """A function record -> result for rule, compiled once and cached."""
+    return _compile_canonical(canonical(rule))
+
+
+def apply(rule, data=None):
+    """Drop-in for jsonLogic(rule, data), through the compiled-rule cache."""
+    return compile_rule(rule)(data)
+
+
+cache_info = _compile_canonical.cache_info
+cache_clear = _compile_canonical.cache_clear
@@ -0,0 +1,285 @@
+"""
+Streaming JsonLogic evaluation for inputs too big to load in one go.
+
+Records come from NDJSON (one JSON value per line) or from a top-level JSON
+array, optionally one found under a key of a top-level object, like the
+"formData" list of data.json. Both are read incrementally, so memory is
+bounded by the chunks in flight and never by the size of the file.
+
+Records are cut into chunks of CHUNK_RECORDS and evaluated on a process pool
+where every worker compiles the rule once (json_logic_compiler). NDJSON lines
+are sent to the workers undecoded, so parsing is parallel too; array items
+have to be parsed here to find where they end. Results are written as NDJSON,
+one line per record, in input order.
+
+    python json_logic_stream.py rule.json records.ndjson --out scores.ndjson
+    python json_logic_stream.py rule.json data.json --key formData --workers 8
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import re
+import resource
+import sys
+import time
+from collections import deque
+
+from json_logic_compiler import compile_rule
+
+READ_SIZE = 1 << 20
+CHUNK_RECORDS = 2000
+FORMATS = ("auto", "ndjson", "array")
+
+_DECODER = json.JSONDecoder()
+_BLANK = re.compile(r"[ \t\n\r]*")
+_TAIL = 16  # a decode error this close to the end of the buffer may be a cut value
+
+
+# -- readers ------------------------------------------------------------------
+
+def iter_ndjson(f):
+    """Raw lines (undecoded) of an NDJSON file opened in binary mode; blank lines are skipped."""
+    for line in f:
+        if not line.isspace():
+            yield line
+
+
+class _Reader:
+    """A window over a text file that only keeps what has not been parsed yet."""
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        # Read at least as much as is left, so a value larger than READ_SIZE
+        # is decoded again only a logarithmic number of times.
+        data = self.f.read(max(READ_SIZE, len(self.buf) - self.pos))
+        if not data:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """The next non-blank character, or "" at the end of the file."""
+        while True:
+            self.pos = _BLANK.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"expected {char!r}, found {found or 'end of file'!r}")
+        self.pos += 1
+
+    def cut(self, exc):
+        """Whether a decode error can be a value that goes on past the buffer."""
+        return (exc.msg.startswith("Unterminated string")  # no closing quote in the buffer
+                or len(self.buf) - exc.pos < _TAIL)
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as exc:
+                if self.cut(exc) and self.fill():
+                    continue
+                raise
+            # A number that ends near the end of the buffer may go on in the
+            # next read ("12" of "12.5", "1" of "1e3").
+            if len(self.buf) - end < _TAIL and not self.eof and self.fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_array(f, key=None):
+    """
+    Items of the top-level array of a text file, one at a time. With key, the
+    file holds an object and the array is the value of that key (KeyError if
+    it has no such key).
+    """
+    reader = _Reader(f)
+    if key is not None:
+        reader.expect("{")
+        while True:
+            if reader.peek() == "}":
+                raise KeyError(key)
+            name = reader.value()
+            reader.expect(":")
+            if name == key:
+                break
+            reader.value()  # another member: parsed whole and dropped
+            if reader.peek() == ",":
+                reader.pos += 1
+    reader.expect("[")
+    if reader.peek() == "]":
+        return
+    for i in itertools.count():
+        try:
+            item = reader.value()
+        except json.JSONDecodeError as exc:
+            # exc.pos counts from the start of the window, not of the file.
+            raise ValueError(f"record {i}: {exc.msg}") from None
+        yield item
+        separator = reader.peek()
+        reader.pos += 1
+        if separator == "]":
+            return
+        if separator != ",":
+            raise ValueError(f"expected ',' or ']' in array, found {separator or 'end of file'!r}")
+
+
+def detect_format(path, key=None):
+    """"ndjson" or "array", from the extension or else from the first character."""
+    if key is not None:
+        return "array"
+    if path.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    with open(path, "rb") as f:
+        head = f.read(64).lstrip()
+    return "array" if head.startswith(b"[") else "ndjson"
+
+
+def chunked(items, size):
+    items = iter(items)
+    while True:
+        chunk = list(itertools.islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# -- evaluation ---------------------------------------------------------------
+
+_rule = None
+
+
+def _init_worker(rule):
+    global _rule
+    _rule = compile_rule(rule)
+
+
+def _evaluate_chunk(first, items, raw, skip_errors):
+    """NDJSON lines with the results for a chunk, and how many records failed."""
+    lines = []
+    errors = 0
+    for i, item in enumerate(items, first):
+        try:
+            result = _rule(json.loads(item) if raw else item)
+        except Exception as exc:
+            if not skip_errors:
+                raise ValueError(f"record {i}: {type(exc).__name__}: {exc}") from None
+            errors += 1
+            result = None
+        lines.append(json.dumps(result, separators=(",", ":")))
+    lines.append("")
+    return "\n".join(lines), errors
+
+
+def evaluate_stream(rule, records, out, raw=False, workers=None,
+                    chunk_records=CHUNK_RECORDS, skip_errors=False):
+    """
+    Evaluate rule on every record and write the results to out (a text file)
+    in input order. records are decoded values, or raw JSON strings/bytes with
+    raw=True. Records that fail raise ValueError, or with skip_errors give a
+    null result and are counted. Returns (records, errors).
+    """
+    workers = workers or os.cpu_count() or 1
+    tasks = ((first, chunk, raw, skip_errors) for first, chunk in
+             zip(itertools.count(0, chunk_records), chunked(records, chunk_records)))
+    count = errors = 0
+
+    def write(chunk, result):
+        nonlocal count, errors
+        out.write(result[0])
+        count += len(chunk)
+        errors += result[1]
+
+    if workers == 1:
+        _init_worker(rule)
+        for args in tasks:
+            write(args[1], _evaluate_chunk(*args))
+        return count, errors
+
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(rule,)) as pool:
+        # A bounded window of chunks in flight keeps memory flat and the order intact.
+        pending = deque((args, pool.apply_async(_evaluate_chunk, args))
+                        for args in itertools.islice(tasks, 2 * workers))
+        while pending:
+            args, result = pending.popleft()
+            write(args[1], result.get())
+            for args in itertools.islice(tasks, 1):
+                pending.append((args, pool.apply_async(_evaluate_chunk, args)))
+    return count, errors
+
+
+def evaluate_file(rule, path, out, fmt="auto", key=None, **options):
+    """evaluate_stream over an NDJSON or JSON-array file."""
+    if fmt == "auto":
+        fmt = detect_format(path, key)
+    if fmt == "ndjson":
+        with open(path, "rb") as f:
+            return evaluate_stream(rule, iter_ndjson(f), out, raw=True, **options)
+    with open(path, "r", encoding="utf-8") as f:
+        return evaluate_stream(rule, iter_json_array(f, key), out, **options)
+
+
+def peak_rss_mib():
+    """Peak resident set size of this process and of its (finished) workers, in MiB."""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    workers = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return own / 1024, workers / 1024  # ru_maxrss is in KiB on Linux
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("rule", help="JSON file with the rule")
+    parser.add_argument("input", help="NDJSON or JSON file with the records")
+    parser.add_argument("--out", default="-", help="NDJSON results (default: stdout)")
+    parser.add_argument("--format", choices=FORMATS, default="auto")
+    parser.add_argument("--key", help="the records are the array under this key of a top-level object")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk", type=int, default=CHUNK_RECORDS, help="records per task")
+    parser.add_argument("--skip-errors", action="store_true",
+                        help="write null for records that fail instead of stopping")
+    args = parser.parse_args()
+
+    with open(args.rule, encoding="utf-8") as f:
+        rule = json.load(f)
+    compile_rule(rule)  # a bad rule fails here, before any worker starts
+
+    start = time.perf_counter()
+    out = sys.stdout if args.out == "-" else open(args.out, "w", encoding="utf-8",
+                                                  buffering=READ_SIZE)
+    try:
+        count, errors = evaluate_file(rule, args.input, out, args.format, args.key,
+                                      workers=args.workers, chunk_records=args.chunk,
+                                      skip_errors=args.skip_errors)
+    except KeyError:
+        parser.exit(1, f"json_logic_stream.py: {args.input}: no {args.key!r} key\n")
+    except ValueError as exc:
+        parser.exit(1, f"json_logic_stream.py: {args.input}: {exc}\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - start
+
+    own, workers = peak_rss_mib()
+    print(f"{count:,} records in {elapsed:.2f} s ({count / max(elapsed, 1e-9):,.0f} records/s), "
+          f"{errors:,} errors", file=sys.stderr)
+    print(f"peak RSS: {own:.0f} MiB main, {workers:.0f} MiB largest worker", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,13 @@
+import json
+
 from json_logic import jsonLogic
 
+from json_logic_compiler import compile_rule
+
+AREA = { "if": [ { "missing": [ "formData.length", "formData.radius" ] }, 0, { "*": [ { "var": "formData.length" }, { "*": [ { "var": "formData.radius" }, { "var": "formData.radius" } ] }, 3.14 ] } ] }
 
 with open("data.json", "r") as alunos:
-    data = alunos.read()
+    data = json.load(alunos)
 
-print(jsonLogic( { "if": [ { "missing": [ "formData.length", "formData.radius" ] }, 0, { "*": [ { "var": "formData.length" }, { "*": [ { "var": "formData.radius" }, { "var": "formData.radius" } ] }, { "var": 3.14 } ] } ] }, data))
\ No newline at end of file
+print(jsonLogic(AREA, data))
+print(compile_rule(AREA)(data))
@@ -1,69 +1,260 @@
+import argparse
+import json
 import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-# 1 Criar pastas: imagens, audios, documentos, videos, outros
-# 2 Pegar o nome dos arquivos
-# 3 Pegar a extensão do arquivo para determinar o tipo
-# 4 Mover arquivos para as pastas correspondentes
+from downloads_move import RateLimiter, move
+
+# 1 Planejar: listar os arquivos (os.scandir, sem stat extra por arquivo) e
+#   decidir a pasta de cada um pela extensão
+# 2 Executar: criar as pastas e mover os arquivos, sem sobrescrever nada
+# 3 Mostrar um resumo (ou, com --dry-run, só os planos numa lista JSON)
 
 DOWNLOADS_PATH = Path.joinpath(Path.home(), "Downloads")
 DESKTOP_PATH = Path.joinpath(Path.home(), "Desktop")
 
-audios_ext = ['.mp3', '.wav']
-videos_ext = ['.mp4', '.mov', '.avi']
-imagens_ext = ['.jpg', '.jpeg', '.png']
-documentos_ext = ['.txt', '.log', '.pdf']
+CATEGORIAS = {
+    "audios": ['.mp3', '.wav'],
+    "videos": ['.mp4', '.mov', '.avi'],
+    "imagens": ['.jpg', '.jpeg', '.png'],
+    "documentos": ['.txt', '.log', '.pdf'],
+}
+OUTROS = "outros"
+PASTAS = list(CATEGORIAS) + [OUTROS]
+
+# extensão (minúscula) -> pasta, montado uma vez só
+EXTENSOES = {ext: pasta for pasta, exts in CATEGORIAS.items() for ext in exts}
 
 
 def pegar_extensao(nome):
-    index = nome.rfind('.')
-    return nome[index:]
-
-
-def organizar(diretorio):
-    AUDIOS_DIR =  os.path.join(diretorio, "audios")
-    IMAGENS_DIR =  os.path.join(diretorio, "imagens")
-    DOCS_DIR =  os.path.join(diretorio, "documentos")
-    VIDEOS_DIR =  os.path.join(diretorio, "videos")
-    OUTROS_DIR =  os.path.join(diretorio, "outros")
-
-    if not os.path.isdir(AUDIOS_DIR):
-        os.mkdir(AUDIOS_DIR)
-    if not os.path.isdir(IMAGENS_DIR):
-        os.mkdir(IMAGENS_DIR)
-    if not os.path.isdir(DOCS_DIR):
-        os.mkdir(DOCS_DIR)
-    if not os.path.isdir(VIDEOS_DIR):
-        os.mkdir(VIDEOS_DIR)
-    if not os.path.isdir(OUTROS_DIR):
-        os.mkdir(OUTROS_DIR)
-
-
-    nomes_arquivos = os.listdir(diretorio)
-    nova_pasta = ''
-    for arquivo in nomes_arquivos:
-        if os.path.isfile(os.path.join(diretorio, arquivo)):
-            # extensão do arquivo com letras minúsculas
-            extensao = str.lower(pegar_extensao(arquivo))
-            print(arquivo, extensao)
-            if extensao in audios_ext:
-                nova_pasta = AUDIOS_DIR
-            elif extensao in videos_ext:
-                nova_pasta = VIDEOS_DIR
-            elif extensao in imagens_ext:
-                nova_pasta = IMAGENS_DIR
-            elif extensao in documentos_ext:
-                nova_pasta = DOCS_DIR
-            else:
-                nova_pasta = OUTROS_DIR
-            # move o arquivo para a pasta correspondente
-            velho = os.path.join(diretorio, arquivo)
-            novo = os.path.join(nova_pasta, arquivo)
-            os.rename(velho, novo)
-            print("Moveu:", velho, "->", novo)
+    return os.path.splitext(nome)[1]
+
+
+def categoria(nome):
+    return EXTENSOES.get(pegar_extensao(nome).lower(), OUTROS)
+
+
+def nome_livre(nome, ocupados):
+    """nome, ou "nome (1).ext", "nome (2).ext"... o primeiro que não estiver em ocupados"""
+    if nome not in ocupados:
+        return nome
+    base, ext = os.path.splitext(nome)
+    n = 1
+    while f"{base} ({n}){ext}" in ocupados:
+        n += 1
+    return f"{base} ({n}){ext}"
+
+
+def _nomes(pasta):
+    try:
+        with os.scandir(pasta) as it:
+            return {entry.name for entry in it}
+    except FileNotFoundError:
+        return set()
+
+
+def planejar(diretorio):
+    """
+    Lista de movimentos (origem, destino, pasta) para organizar diretorio.
+    Nada é mexido no disco; nomes que já existem no destino (ou que outro
+    arquivo do plano vai usar) ganham um sufixo " (n)".
+    """
+    diretorio = os.fspath(diretorio)
+    ocupados = {}  # pasta -> nomes já usados lá, lidos só quando a pasta aparece
+    plano = []
+    with os.scandir(diretorio) as it:
+        entradas = sorted((entry for entry in it if entry.is_file()), key=lambda e: e.name)
+    for entry in entradas:
+        pasta = categoria(entry.name)
+        if pasta not in ocupados:
+            ocupados[pasta] = _nomes(os.path.join(diretorio, pasta))
+        nome = nome_livre(entry.name, ocupados[pasta])
+        ocupados[pasta].add(nome)
+        plano.append((entry.path, os.path.join(diretorio, pasta, nome), pasta))
+    return plano
+
+
+def mover(origem, destino, limitador=None):
+    """
+    Move sem sobrescrever: se o destino apareceu depois do plano, usa o
+    próximo nome livre. Entre discos diferentes copia pelo kernel (ver
+    downloads_move). Devolve o destino usado e quantos bytes foram copiados.
+    """
+    pasta, nome = os.path.split(destino)
+    while True:
+        try:
+            _, copiados = move(origem, destino, limitador)
+        except FileExistsError:
+            destino = os.path.join(pasta, nome_livre(nome, _nomes(pasta)))
+            continue
+        return destino, copiados
+
+
+def _mover_cronometrado(origem, destino, limitador):
+    inicio = time.perf_counter()
+    _, copiados = mover(origem, destino, limitador)
+    return copiados, time.perf_counter() - inicio
+
+
+def executar(plano, workers=1, limite=None):
+    """
+    Faz os movimentos do plano, até `workers` ao mesmo tempo, com as cópias
+    entre discos somando no máximo `limite` bytes/s. Devolve {pasta: quantos},
+    os erros e, por pasta de destino, bytes copiados e segundos gastos.
+    """
+    movidos = {}
+    erros = []
+    transferencias = {}
+    for caminho_pasta in {os.path.dirname(destino) for _, destino, _ in plano}:
+        os.makedirs(caminho_pasta, exist_ok=True)
+    limitador = RateLimiter(limite) if limite else None
+    with ThreadPoolExecutor(max(1, workers)) as pool:
+        futuros = [(origem, pasta, pool.submit(_mover_cronometrado, origem, destino, limitador))
+                   for origem, destino, pasta in plano]
+        for origem, pasta, futuro in futuros:
+            try:
+                copiados, segundos = futuro.result()
+            except OSError as exc:
+                erros.append((origem, str(exc)))
+                continue
+            movidos[pasta] = movidos.get(pasta, 0) + 1
+            if copiados:
+                total = transferencias.setdefault(pasta, [0, 0, 0.0])
+                total[0] += 1
+                total[1] += copiados
+                total[2] += segundos
+    return movidos, erros, transferencias
+
+
+def organizar_arquivo(diretorio, nome):
+    """Move um arquivo só (usado pelo modo --watch). Devolve o destino."""
+    diretorio = os.fspath(diretorio)
+    pasta = os.path.join(diretorio, categoria(nome))
+    os.makedirs(pasta, exist_ok=True)
+    return mover(os.path.join(diretorio, nome), os.path.join(pasta, nome))[0]
+
+
+def arquivos_organizados(diretorio):
+    """Todos os arquivos que já estão nas pastas de categoria de diretorio."""
+    caminhos = []
+    for pasta in PASTAS:
+        try:
+            with os.scandir(os.path.join(diretorio, pasta)) as it:
+                caminhos.extend(entry.path for entry in it if entry.is_file(follow_symlinks=False))
+        except FileNotFoundError:
+            pass
+    return caminhos
+
+
+def deduplicar(diretorio, politica="report"):
+    """Procura arquivos repetidos nas pastas de categoria e aplica a política."""
+    from downloads_dedup import apply_policy, find_duplicates
+    grupos, stats = find_duplicates(arquivos_organizados(os.fspath(diretorio)))
+    erros = apply_policy(grupos, politica)
+    return {"grupos": grupos, "stats": stats, "erros": erros}
+
+
+def resumo_dedup(diretorio, politica, resultado):
+    stats = resultado["stats"]
+    copias = sum(len(grupo) - 1 for grupo in resultado["grupos"])
+    acao = {"report": "encontradas", "link": "viraram hard links", "remove": "removidas"}[politica]
+    return (f"{os.fspath(diretorio)}: {copias} cópias repetidas {acao} "
+            f"({stats['wasted_bytes'] / 2**20:.1f} MiB); "
+            f"lidos {stats['bytes_hashed'] / 2**20:.1f} MiB de "
+            f"{stats['bytes_scanned'] / 2**20:.1f} MiB em {stats['files']} arquivos")
+
+
+def plano_json(diretorio, plano):
+    return {
+        "diretorio": os.fspath(diretorio),
+        "movimentos": [{"origem": o, "destino": d, "pasta": p} for o, d, p in plano],
+    }
+
+
+def organizar(diretorio, dry_run=False, workers=1, limite=None):
+    plano = planejar(diretorio)
+    if dry_run:
+        return plano_json(diretorio, plano)
+    movidos, erros, transferencias = executar(plano, workers, limite)
+    return {"diretorio": os.fspath(diretorio), "movidos": movidos, "erros": erros,
+            "transferencias": transferencias}
+
+
+def resumo(resultado):
+    movidos = resultado["movidos"]
+    partes = ", ".join(f"{pasta} {movidos[pasta]}" for pasta in PASTAS if pasta in movidos)
+    linha = f"{resultado['diretorio']}: {sum(movidos.values())} arquivos movidos"
+    if partes:
+        linha += f" ({partes})"
+    if resultado["erros"]:
+        linha += f", {len(resultado['erros'])} erros"
+    for pasta, (arquivos, copiados, segundos) in sorted(resultado["transferencias"].items()):
+        # segundos somados entre as cópias da pasta: é a vazão de cada cópia
+        linha += (f"\n  {pasta}: {arquivos} copiados de outro disco, "
+                  f"{copiados / 2**20:.1f} MiB a {copiados / 2**20 / max(segundos, 1e-9):.1f} MiB/s")
+    return linha
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Organiza arquivos em pastas pela extensão.")
+    parser.add_argument("diretorios", nargs="*", default=[DOWNLOADS_PATH, DESKTOP_PATH])
+    parser.add_argument("--dry-run", action="store_true",
+                        help="não move nada, só imprime o plano em JSON "
+                             "(uma lista com um plano por diretório)")
+    parser.add_argument("--watch", action="store_true",
+                        help="fica rodando e organiza os arquivos novos quando terminam de baixar")
+    parser.add_argument("--indice", default=os.path.join(Path.home(), ".organize-downloads.db"),
+                        help="índice SQLite do modo --watch")
+    parser.add_argument("--estavel", type=float, default=2.0,
+                        help="segundos sem mudar de tamanho para um arquivo contar como baixado")
+    parser.add_argument("--polling", action="store_true", help="não usa inotify")
+    parser.add_argument("--dedup", choices=("report", "link", "remove"),
+                        help="depois de organizar, procura arquivos repetidos e só avisa "
+                             "(report), troca as cópias por hard links (link) ou apaga (remove)")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="quantos arquivos mover ao mesmo tempo")
+    parser.add_argument("--limite-mb", type=float,
+                        help="limite de MiB/s somando as cópias entre discos")
+    args = parser.parse_args(argv)
+    limite = args.limite_mb * 2**20 if args.limite_mb else None
+
+    if args.watch:
+        from downloads_watch import Index, Poller, Watcher
+        indice = Index(args.indice)
+        watcher = Watcher(args.diretorios, organizar_arquivo, indice, stable=args.estavel,
+                          source=Poller() if args.polling else None)
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            indice.close()
+            print(f"{watcher.handled} arquivos organizados")
+        return
+
+    if args.dry_run:
+        planos = [organizar(diretorio, dry_run=True) for diretorio in args.diretorios]
+        json.dump(planos, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+        return
+
+    for diretorio in args.diretorios:
+        resultado = organizar(diretorio, workers=args.workers, limite=limite)
+        print(resumo(resultado))
+        for origem, erro in resultado["erros"]:
+            print("Erro:", origem, erro, file=sys.stderr)
+        if args.dedup:
+            repetidos = deduplicar(diretorio, args.dedup)
+            for grupo in repetidos["grupos"]:
+                print("Repetidos:", " = ".join(grupo))
+            print(resumo_dedup(diretorio, args.dedup, repetidos))
+            for caminho, erro in repetidos["erros"]:
+                print("Erro:", caminho, erro, file=sys.stderr)
 
 
 if __name__ == '__main__':
 
-    organizar(DOWNLOADS_PATH)
-    organizar(DESKTOP_PATH)
\ No newline at end of file
+    main()
@@ -1,16 +1,5 @@
-import math
+from prime_engine import is_prime, is_prime_many, prime_count, primes_in_range
 
 def isPrime(x):
-    
-    if x == 2:
-     return False   
-
-    if x%2==0:
-        return False
-    
-    upper_limit = int( math.sqrt(x) + 1)
-
-    for i in range(3, upper_limit, 2):
-        if x%i==0:
-            return False
-    return True
\ No newline at end of file
+    """Return True if x is prime (see prime_engine.py)."""
+    return is_prime(x)
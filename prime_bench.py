@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Scaling benchmark for prime_engine's parallel sieve.
+
+Counts the primes up to --limit with 1, 2, 4, ... workers (up to --workers,
+the number of CPUs by default) and prints the time and the speedup over one
+worker. Limits up to 1e11 work; memory stays bounded because every worker
+sieves one segment at a time and only counts travel back.
+
+    python prime_bench.py --limit 1e9
+    python prime_bench.py --limit 1e11 --workers 16 --runs 1
+"""
+import argparse
+import os
+import time
+
+from prime_engine import prime_count
+
+
+def worker_steps(max_workers):
+    """1, 2, 4, ... up to max_workers, always ending with max_workers itself."""
+    steps = []
+    w = 1
+    while w < max_workers:
+        steps.append(w)
+        w *= 2
+    steps.append(max_workers)
+    return steps
+
+
+def best_time(limit, workers, runs):
+    best, count = None, None
+    for _ in range(runs):
+        start = time.perf_counter()
+        count = prime_count(limit, workers=workers)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return count, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--limit", type=float, default=1e8,
+                        help="count primes up to this number (e.g. 1e9, 1e11)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--runs", type=int, default=3, help="best of this many runs")
+    args = parser.parse_args()
+
+    limit = int(args.limit)
+    print(f"pi({limit:,}) on {os.cpu_count()} CPUs")
+    print(f"{'workers':>8}{'seconds':>12}{'speedup':>10}{'count':>16}")
+    baseline = None
+    for workers in worker_steps(args.workers):
+        count, seconds = best_time(limit, workers, args.runs)
+        baseline = baseline or seconds
+        print(f"{workers:>8}{seconds:>12.3f}{baseline / seconds:>9.2f}x{count:>16,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""
+Prime engine shared by prime.py and text_handling/prime.py.
+
+Segmented Sieve of Eratosthenes over odd numbers only: one byte per odd
+number, crossed off with slice assignment so the inner loop runs in C.
+Numbers below SMALL_PRIME_LIMIT are answered by a table lookup; larger ones
+go through trial division by a few small primes and then a deterministic
+Miller-Rabin test.
+"""
+import itertools
+import math
+import multiprocessing
+import os
+from array import array
+from collections import deque
+from functools import lru_cache
+from multiprocessing import shared_memory
+
+try:
+    import numpy as np
+except ImportError:  # is_prime_many() falls back to plain Python
+    np = None
+
+# is_prime() answers from a precomputed table below this bound.
+SMALL_PRIME_LIMIT = 1 << 20
+
+# Odd numbers per sieve segment; 256 KiB of bytes stays in L2 cache.
+SEGMENT_SIZE = 1 << 18
+
+
+def _l2_cache_bytes(default=1 << 20):
+    """Size of CPU 0's L2 cache (Linux sysfs), or default if it cannot be read."""
+    base = "/sys/devices/system/cpu/cpu0/cache"
+    try:
+        for entry in sorted(os.listdir(base)):
+            with open(os.path.join(base, entry, "level")) as f:
+                if f.read().strip() != "2":
+                    continue
+            with open(os.path.join(base, entry, "size")) as f:
+                size = f.read().strip()
+            units = {"K": 1 << 10, "M": 1 << 20}
+            return int(size[:-1]) * units[size[-1]] if size[-1] in units else int(size)
+    except (OSError, ValueError):
+        pass
+    return default
+
+
+# Segments never grow past this: one byte per odd number, so a whole segment
+# still fits in L2 while it is being crossed off.
+MAX_SEGMENT_SIZE = max(SEGMENT_SIZE, _l2_cache_bytes())
+
+# With these witnesses Miller-Rabin has no false positives below 3.18 * 10**23,
+# which covers every 64-bit integer. Above that the answer is "probable prime".
+MR_WITNESSES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)
+
+# Trial division by these primes weeds out most composites before Miller-Rabin.
+PREFILTER_LIMIT = 256
+
+# How many Miller-Rabin results are remembered for repeated queries.
+MR_CACHE_SIZE = 1 << 16
+
+
+@lru_cache(maxsize=8)
+def odd_sieve(limit):
+    """
+    Byte table for odd numbers below limit: entry i is 1 if 2*i + 1 is prime.
+    Cached, so repeated calls with the same limit are free.
+    """
+    size = limit // 2
+    sieve = bytearray([1]) * size
+    if size:
+        sieve[0] = 0  # 1 is not prime
+    for i in range(1, (math.isqrt(max(limit - 1, 0)) - 1) // 2 + 1):
+        if sieve[i]:
+            p = 2 * i + 1
+            start = p * p // 2
+            sieve[start::p] = bytes(len(range(start, size, p)))
+    return sieve
+
+
+def small_primes(limit):
+    """All primes below limit, as a list."""
+    if limit <= 2:
+        return []
+    sieve = odd_sieve(limit)
+    return [2] + list(itertools.compress(range(1, limit, 2), sieve))
+
+
+# The odd primes trial division tries, in order; computed once for is_prime().
+_PREFILTER_PRIMES = tuple(small_primes(PREFILTER_LIMIT)[1:])
+
+
+def set_small_prime_limit(limit):
+    """Change the bound of the is_prime() lookup table (rebuilt on next use)."""
+    global SMALL_PRIME_LIMIT
+    SMALL_PRIME_LIMIT = limit
+
+
+def _table_limit():
+    # Never below PREFILTER_LIMIT: trial division by p must not see p itself,
+    # and Miller-Rabin needs n > MR_WITNESSES[-1].
+    return max(SMALL_PRIME_LIMIT, PREFILTER_LIMIT)
+
+
+@lru_cache(maxsize=MR_CACHE_SIZE)
+def miller_rabin(n):
+    """Miller-Rabin with the fixed MR_WITNESSES, for odd n > MR_WITNESSES[-1]."""
+    d = n - 1
+    s = 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for a in MR_WITNESSES:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def is_prime(n):
+    """Return True if n is prime."""
+    if n < 2:
+        return False
+    if n % 2 == 0:
+        return n == 2
+    if n < _table_limit():
+        return bool(odd_sieve(_table_limit())[n >> 1])
+    for p in _PREFILTER_PRIMES:
+        if n % p == 0:
+            return False
+    return miller_rabin(n)
+
+
+def is_prime_many(values):
+    """
+    Primality of many integers at once.
+
+    With NumPy, values may be any integer array-like; the table lookup and the
+    small-prime filter run vectorized and only the survivors go through
+    Miller-Rabin. Returns a boolean ndarray (a list of bools without NumPy).
+    """
+    if np is None:
+        return [is_prime(int(n)) for n in values]
+    arr = np.asarray(values)
+    if arr.dtype.kind not in "iu":
+        # Python ints beyond 64 bits, or floats: no vectorized path.
+        flat = [is_prime(int(n)) for n in arr.ravel()]
+        return np.array(flat, dtype=bool).reshape(arr.shape)
+
+    flat = arr.ravel()
+    result = np.zeros(flat.shape, dtype=bool)
+    # Small values: look them up in the sieve table.
+    limit = _table_limit()
+    table = np.frombuffer(odd_sieve(limit), dtype=np.uint8)
+    small = np.flatnonzero((flat >= 2) & (flat < limit))
+    values = flat[small]
+    result[small] = np.where(values % 2 == 1, table[values // 2] == 1, values == 2)
+
+    # Large values: strike out multiples of small primes, shrinking the
+    # candidate set as we go, then run Miller-Rabin on what is left.
+    large = np.flatnonzero((flat >= limit) & (flat % 2 == 1))
+    values = flat[large]
+    for p in _PREFILTER_PRIMES:
+        keep = values % p != 0
+        large, values = large[keep], values[keep]
+    for i, n in zip(large.tolist(), values.tolist()):
+        result[i] = miller_rabin(n)
+    return result.reshape(arr.shape)
+
+
+def segment_size_for(hi):
+    """
+    Odd numbers per segment for a range ending at hi: grown for big ranges, so
+    the per-prime Python loop of each segment does not dominate, but never
+    beyond MAX_SEGMENT_SIZE (the L2 cache).
+    """
+    return min(max(SEGMENT_SIZE, 8 * math.isqrt(max(hi, 0))), MAX_SEGMENT_SIZE)
+
+
+def _base_primes(hi):
+    """Odd primes up to sqrt(hi), enough to sieve anything below hi."""
+    return small_primes(math.isqrt(max(hi - 1, 0)) + 1)[1:]
+
+
+def _segments(lo, hi, segment_size, base=None):
+    """
+    Sieve [lo, hi) one segment at a time, yielding (first odd number, byte table)
+    where entry i of the table tells whether first + 2*i is prime.
+    """
+    if base is None:
+        base = _base_primes(hi)
+    low = max(lo, 3) | 1
+    zeros = memoryview(bytes(segment_size))
+    while low < hi:
+        high = min(low + 2 * segment_size, hi)
+        size = (high - low + 1) // 2
+        seg = bytearray([1]) * size
+        for p in base:
+            if p * p >= high:
+                break
+            start = max(p * p, (low + p - 1) // p * p)
+            if start % 2 == 0:
+                start += p
+            index = (start - low) // 2
+            if index < size:
+                seg[index::p] = zeros[:len(range(index, size, p))]
+        yield low, seg
+        low = high | 1 if high % 2 == 0 else high
+
+
+# -- parallel sieving --------------------------------------------------------
+#
+# The range is cut into tasks of SEGMENTS_PER_TASK segments each and handed to
+# a process pool. The base primes are written once into shared memory; every
+# worker maps them instead of receiving a pickled copy per task. Results come
+# back in task order, with at most a few tasks in flight per worker, so
+# primes_in_range() still streams in sorted order with bounded memory.
+
+SEGMENTS_PER_TASK = 8
+
+_worker_shm = None
+_worker_base = None
+
+
+def _attach_base(name, count):
+    """Pool initializer: map the shared base-prime table."""
+    global _worker_shm, _worker_base
+    _worker_shm = shared_memory.SharedMemory(name=name)
+    _worker_base = _worker_shm.buf[:4 * count].cast("I")
+
+
+def _count_task(lo, hi, segment_size):
+    return sum(seg.count(1) for _, seg in _segments(lo, hi, segment_size, _worker_base))
+
+
+def _primes_task(lo, hi, segment_size):
+    found = array("Q")
+    for low, seg in _segments(lo, hi, segment_size, _worker_base):
+        found.extend(itertools.compress(range(low, low + 2 * len(seg), 2), seg))
+    return found
+
+
+def _parallel(task, lo, hi, segment_size, workers):
+    """Run task over [lo, hi) in a process pool; yield the results in range order."""
+    base = array("I", _base_primes(hi))
+    assert base.itemsize == 4
+    shm = shared_memory.SharedMemory(create=True, size=max(4 * len(base), 1))
+    try:
+        shm.buf[:4 * len(base)] = base.tobytes()
+        span = 2 * segment_size * SEGMENTS_PER_TASK
+        tasks = ((start, min(start + span, hi), segment_size) for start in range(lo, hi, span))
+        with multiprocessing.Pool(workers, initializer=_attach_base,
+                                  initargs=(shm.name, len(base))) as pool:
+            pending = deque(pool.apply_async(task, args)
+                            for args in itertools.islice(tasks, 2 * workers))
+            while pending:
+                result = pending.popleft().get()
+                for args in itertools.islice(tasks, 1):
+                    pending.append(pool.apply_async(task, args))
+                yield result
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def primes_in_range(lo, hi, segment_size=None, *, workers=1):
+    """
+    Yield the primes p with lo <= p < hi, in increasing order.
+    With workers > 1 the range is sieved by that many processes.
+    """
+    segment_size = segment_size or segment_size_for(hi)
+    if lo <= 2 < hi:
+        yield 2
+    if workers > 1:
+        for found in _parallel(_primes_task, lo, hi, segment_size, workers):
+            yield from found
+        return
+    for low, seg in _segments(lo, hi, segment_size):
+        yield from itertools.compress(range(low, low + 2 * len(seg), 2), seg)
+
+
+def count_primes_in_range(lo, hi, segment_size=None, *, workers=1):
+    """
+    Number of primes p with lo <= p < hi (the range of primes_in_range).
+    With workers > 1 the range is sieved by that many processes.
+    """
+    if hi <= lo:
+        return 0
+    segment_size = segment_size or segment_size_for(hi)
+    count = 1 if lo <= 2 < hi else 0
+    if workers > 1:
+        return count + sum(_parallel(_count_task, lo, hi, segment_size, workers))
+    return count + sum(seg.count(1) for _, seg in _segments(lo, hi, segment_size))
+
+
+def prime_count(n, segment_size=None, *, workers=1):
+    """Number of primes p <= n. With workers > 1 it is sieved by that many processes."""
+    return count_primes_in_range(0, n + 1, segment_size, workers=workers)
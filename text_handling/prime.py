@@ -1,16 +1,11 @@
-import math
+import os
+import sys
 
-def isPrime(x):
-    
-    if x == 2:
-     return False   
+# Same implementation as the top-level prime.py: prime_engine.py lives one level up.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-    if x%2==0:
-        return False
-    
-    upper_limit = int( math.sqrt(x) + 1)
+from prime_engine import is_prime, is_prime_many, prime_count, primes_in_range
 
-    for i in range(3, upper_limit, 2):
-        if x%i==0:
-            return False
-    return True
\ No newline at end of file
+def isPrime(x):
+    """Return True if x is prime (see prime_engine.py)."""
+    return is_prime(x)
@@ -0,0 +1,136 @@
+"""
+In-memory registry of THE MACHINE's ASCII art.
+
+Art is read once, either from the ascii_art/ folder or from a single packed
+bundle file, on first use (or all at once with preload()). The bundle is
+memory-mapped, so the frozen build serves rewards without touching the
+filesystem again.
+
+Bundle layout:
+    8 bytes   magic (BUNDLE_MAGIC)
+    4 bytes   little-endian length of the index
+    index     JSON object {name: [offset, length]}, offsets relative to the data
+    data      the UTF-8 art files, back to back
+"""
+import mmap
+import os
+import struct
+import sys
+
+ART_DIR = "ascii_art"
+BUNDLE_NAME = "ascii_art.bundle"
+BUNDLE_MAGIC = b"MACHART1"
+_HEADER = struct.Struct("<8sI")
+
+
+def resource_dir():
+    """Folder holding the machine's data files (PyInstaller's temp dir when frozen)."""
+    return getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__)))
+
+
+class ArtRegistry:
+    """Art pieces by name. Names are the file names without .txt, in lower case."""
+
+    def __init__(self, arts=None, paths=None, bundle=None, index=None, data_start=0):
+        self._arts = dict(arts or {})
+        self._paths = paths or {}
+        self._bundle = bundle
+        self._index = index or {}
+        self._data_start = data_start
+
+    @classmethod
+    def from_directory(cls, path):
+        """List the .txt files of path; each is read once, when first asked for."""
+        paths = {}
+        for entry in os.scandir(path):
+            stem, ext = os.path.splitext(entry.name)
+            if ext == ".txt" and entry.is_file():
+                paths[stem.lower()] = entry.path
+        return cls(paths=paths)
+
+    @classmethod
+    def from_bundle(cls, path):
+        """Map a bundle built by pack_bundle(); pieces are decoded on first use."""
+        import json
+        with open(path, "rb") as f:
+            bundle = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_len = _HEADER.unpack_from(bundle, 0)
+        if magic != BUNDLE_MAGIC:
+            bundle.close()
+            raise ValueError(f"{path} is not an ASCII art bundle")
+        index_start = _HEADER.size
+        index = json.loads(bundle[index_start:index_start + index_len].decode("utf-8"))
+        return cls(bundle=bundle, index=index, data_start=index_start + index_len)
+
+    def names(self):
+        return sorted(set(self._arts) | set(self._paths) | set(self._index))
+
+    def _has(self, key):
+        return key in self._arts or key in self._paths or key in self._index
+
+    def get(self, name):
+        """Return the art called name; raises KeyError if there is no such piece."""
+        key = name.lower()
+        art = self._arts.get(key)
+        if art is None:
+            if key in self._paths:
+                with open(self._paths[key], "r", encoding="utf-8") as f:
+                    art = f.read()
+            elif key in self._index:
+                offset, length = self._index[key]
+                start = self._data_start + offset
+                art = self._bundle[start:start + length].decode("utf-8")
+            else:
+                raise KeyError(f"No ASCII art named {name!r}; "
+                               f"available: {', '.join(self.names())}")
+            self._arts[key] = art
+        return art
+
+    def require(self, names):
+        """Fail fast, at startup, if any of names is missing."""
+        missing = [name for name in names if not self._has(name.lower())]
+        if missing:
+            raise KeyError(f"Missing ASCII art: {', '.join(missing)} "
+                           f"(available: {', '.join(self.names())})")
+
+    def preload(self):
+        """Decode every piece now instead of on first use."""
+        for name in self.names():
+            self.get(name)
+        return self
+
+
+def pack_bundle(src_dir, out_path):
+    """Pack every .txt art file of src_dir into one bundle file."""
+    import json
+    arts = ArtRegistry.from_directory(src_dir)
+    index = {}
+    blobs = []
+    offset = 0
+    for name in arts.names():
+        blob = arts.get(name).encode("utf-8")
+        index[name] = [offset, len(blob)]
+        blobs.append(blob)
+        offset += len(blob)
+    index_bytes = json.dumps(index, sort_keys=True).encode("utf-8")
+    with open(out_path, "wb") as f:
+        f.write(_HEADER.pack(BUNDLE_MAGIC, len(index_bytes)))
+        f.write(index_bytes)
+        f.writelines(blobs)
+    return index
+
+
+def load_default():
+    """Use the packed bundle when one ships next to the program, else the ascii_art/ folder."""
+    base = resource_dir()
+    bundle_path = os.path.join(base, BUNDLE_NAME)
+    if os.path.exists(bundle_path):
+        return ArtRegistry.from_bundle(bundle_path)
+    return ArtRegistry.from_directory(os.path.join(base, ART_DIR))
+
+
+if __name__ == "__main__":
+    base = resource_dir()
+    out = sys.argv[1] if len(sys.argv) > 1 else os.path.join(base, BUNDLE_NAME)
+    packed = pack_bundle(os.path.join(base, ART_DIR), out)
+    print(f"Packed {len(packed)} pieces into {out}")
@@ -0,0 +1,137 @@
+"""
+Retention for the operator log database: python machine.py retention ...
+
+One run does, in order:
+  1. intern   - move each distinct response into `texts` once; log rows keep
+                only its id (the narratives repeat endlessly).
+  2. rollup   - count rows older than --keep-days per day and command into
+                `log_daily`.
+  3. prune    - delete those raw rows and the texts nobody references anymore.
+  4. vacuum   - give the freed pages back to the filesystem (incremental).
+
+Readers should go through the logs_full view, which puts the response back.
+"""
+import argparse
+import datetime
+import hashlib
+import os
+import sqlite3
+
+from log_writer import ensure_schema
+
+ROLLUP_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS log_daily (
+        day TEXT NOT NULL,
+        command TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        sessions INTEGER NOT NULL,
+        PRIMARY KEY (day, command)
+    ) WITHOUT ROWID
+'''
+
+# Rows interned per transaction, so the live log writer is never blocked for long.
+BATCH_ROWS = 50_000
+
+
+def _text_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).digest()
+
+
+def _db_bytes(conn):
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    return page_size * page_count
+
+
+def intern_responses(conn, batch_rows=BATCH_ROWS):
+    """Replace inline responses by references into `texts`. Returns the rows changed."""
+    changed = 0
+    last_id = 0
+    while True:
+        row = conn.execute(
+            "SELECT MAX(id) FROM (SELECT id FROM logs WHERE id > ? ORDER BY id LIMIT ?)",
+            (last_id, batch_rows)).fetchone()
+        if row[0] is None:
+            return changed
+        upper = row[0]
+        with conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO texts (hash, body) "
+                "SELECT text_hash(response), response FROM logs "
+                "WHERE id > ? AND id <= ? AND response IS NOT NULL", (last_id, upper))
+            changed += conn.execute(
+                "UPDATE logs SET response_id = "
+                "(SELECT id FROM texts WHERE hash = text_hash(logs.response)), response = NULL "
+                "WHERE id > ? AND id <= ? AND response IS NOT NULL", (last_id, upper)).rowcount
+        last_id = upper
+
+
+def rollup_and_prune(conn, cutoff):
+    """Aggregate rows older than cutoff (an ISO date) into log_daily, then delete them."""
+    with conn:
+        conn.execute(ROLLUP_SCHEMA)
+        conn.execute(
+            "INSERT INTO log_daily (day, command, count, sessions) "
+            "SELECT substr(timestamp, 1, 10), COALESCE(command, ''), COUNT(*), "
+            "COUNT(DISTINCT session) FROM logs WHERE timestamp < ? GROUP BY 1, 2 "
+            "ON CONFLICT (day, command) DO UPDATE SET "
+            "count = count + excluded.count, sessions = sessions + excluded.sessions",
+            (cutoff,))
+        deleted = conn.execute("DELETE FROM logs WHERE timestamp < ?", (cutoff,)).rowcount
+        conn.execute(
+            "DELETE FROM texts WHERE id NOT IN "
+            "(SELECT response_id FROM logs WHERE response_id IS NOT NULL)")
+    return deleted
+
+
+def vacuum(conn, max_pages=None):
+    """
+    Hand free pages back to the filesystem. The first run on a database switches it
+    to incremental auto-vacuum, which needs one full VACUUM.
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+    elif max_pages:
+        conn.execute(f"PRAGMA incremental_vacuum({int(max_pages)})")
+    else:
+        conn.execute("PRAGMA incremental_vacuum")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+def run(db_path, keep_days=None, max_vacuum_pages=None):
+    """Run every retention step and return a small report dict."""
+    conn = sqlite3.connect(db_path)
+    conn.create_function("text_hash", 1, _text_hash, deterministic=True)
+    try:
+        ensure_schema(conn)
+        file_before = os.path.getsize(db_path)
+        bytes_before = _db_bytes(conn)
+        report = {"interned_rows": intern_responses(conn)}
+        if keep_days is not None:
+            cutoff = (datetime.date.today() - datetime.timedelta(days=keep_days)).isoformat()
+            report["cutoff"] = cutoff
+            report["deleted_rows"] = rollup_and_prune(conn, cutoff)
+        vacuum(conn, max_vacuum_pages)
+        report["texts"] = conn.execute("SELECT COUNT(*) FROM texts").fetchone()[0]
+        report["bytes_before"] = bytes_before
+        report["bytes_after"] = _db_bytes(conn)
+        report["bytes_reclaimed"] = bytes_before - report["bytes_after"]
+        report["file_bytes_reclaimed"] = file_before - os.path.getsize(db_path)
+        return report
+    finally:
+        conn.close()
+
+
+def main(argv, db_path):
+    """Entry point for `machine.py retention`."""
+    parser = argparse.ArgumentParser(prog="machine.py retention")
+    parser.add_argument("--db", default=db_path, help="log database (default: %(default)s)")
+    parser.add_argument("--keep-days", type=int,
+                        help="roll up and delete raw rows older than this many days")
+    parser.add_argument("--vacuum-pages", type=int,
+                        help="free at most this many pages per run (default: all)")
+    args = parser.parse_args(argv)
+    report = run(args.db, args.keep_days, args.vacuum_pages)
+    for key, value in report.items():
+        print(f"{key}: {value}")
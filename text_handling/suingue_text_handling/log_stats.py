@@ -0,0 +1,209 @@
+"""
+Analytics over the operator log database.
+
+    python machine.py stats index
+    python machine.py stats range --since yesterday --until today
+    python machine.py stats counts --since 2025-05-01
+    python machine.py stats search "chinese enigma solved" --sessions --format json
+
+`index` builds a timestamp index and an FTS5 full-text index over command and
+response; triggers keep the full-text index in step with new log rows. The
+other queries create the indexes on first use. Results are streamed row by
+row as CSV (default) or JSON, so big logs never have to fit in memory.
+"""
+import argparse
+import csv
+import datetime
+import json
+import sqlite3
+import sys
+
+from log_writer import ensure_schema
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS logs_timestamp ON logs (timestamp, command)",
+    "CREATE INDEX IF NOT EXISTS logs_command ON logs (command)",
+]
+
+# The full-text index reads through the logs_full view, so responses interned
+# by log_retention.py stay searchable.
+_OLD_RESPONSE = "COALESCE(old.response, (SELECT body FROM texts WHERE id = old.response_id))"
+_NEW_RESPONSE = "COALESCE(new.response, (SELECT body FROM texts WHERE id = new.response_id))"
+
+FTS_SCHEMA = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS logs_fts USING fts5(
+        command, response, content='logs_full', content_rowid='id')""",
+    f"""CREATE TRIGGER IF NOT EXISTS logs_fts_insert AFTER INSERT ON logs BEGIN
+        INSERT INTO logs_fts (rowid, command, response)
+        VALUES (new.id, new.command, {_NEW_RESPONSE});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS logs_fts_delete AFTER DELETE ON logs BEGIN
+        INSERT INTO logs_fts (logs_fts, rowid, command, response)
+        VALUES ('delete', old.id, old.command, {_OLD_RESPONSE});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS logs_fts_update AFTER UPDATE ON logs BEGIN
+        INSERT INTO logs_fts (logs_fts, rowid, command, response)
+        VALUES ('delete', old.id, old.command, {_OLD_RESPONSE});
+        INSERT INTO logs_fts (rowid, command, response)
+        VALUES (new.id, new.command, {_NEW_RESPONSE});
+    END""",
+]
+FTS_OBJECTS = ["logs_fts_insert", "logs_fts_delete", "logs_fts_update", "logs_fts"]
+
+LOG_COLUMNS = ["id", "timestamp", "session", "command", "response"]
+
+
+def build_indexes(conn, rebuild=False):
+    """Create the indexes if needed; fill the full-text index when it is new."""
+    ensure_schema(conn)
+    row = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'logs_fts'").fetchone()
+    has_fts = row is not None and "content='logs_full'" in row[0]
+    with conn:
+        if row is not None and not has_fts:
+            # Index from an older layout that read the logs table directly.
+            for name in FTS_OBJECTS:
+                kind = "TABLE" if name == "logs_fts" else "TRIGGER"
+                conn.execute(f"DROP {kind} IF EXISTS {name}")
+        for statement in INDEXES + FTS_SCHEMA:
+            conn.execute(statement)
+        if rebuild or not has_fts:
+            conn.execute("INSERT INTO logs_fts (logs_fts) VALUES ('rebuild')")
+
+
+def parse_time(value):
+    """Accept an ISO date/time, 'today' or 'yesterday'; return an ISO string."""
+    today = datetime.date.today()
+    if value == "today":
+        return today.isoformat()
+    if value == "yesterday":
+        return (today - datetime.timedelta(days=1)).isoformat()
+    # Validates the value; timestamps are compared as ISO strings.
+    return datetime.datetime.fromisoformat(value).isoformat()
+
+
+def _time_filter(since, until, column="timestamp"):
+    clauses, params = [], []
+    if since:
+        clauses.append(f"{column} >= ?")
+        params.append(since)
+    if until:
+        clauses.append(f"{column} < ?")
+        params.append(until)
+    return clauses, params
+
+
+def query_range(conn, since=None, until=None, command=None):
+    """Log rows in [since, until), oldest first, optionally for one command."""
+    clauses, params = _time_filter(since, until)
+    if command:
+        clauses.append("command = ? COLLATE NOCASE")
+        params.append(command)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    cursor = conn.execute(
+        f"SELECT {', '.join(LOG_COLUMNS)} FROM logs_full {where} ORDER BY timestamp", params)
+    return LOG_COLUMNS, cursor
+
+
+def query_counts(conn, since=None, until=None):
+    """Number of log rows per command, most frequent first."""
+    clauses, params = _time_filter(since, until)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    cursor = conn.execute(
+        f"SELECT command, COUNT(*) AS count FROM logs {where} "
+        "GROUP BY command ORDER BY count DESC, command", params)
+    return ["command", "count"], cursor
+
+
+def query_search(conn, text, since=None, until=None, limit=None, sessions=False):
+    """
+    Full-text search over command and response (FTS5 query syntax).
+    With sessions=True, return each matching session once instead of the rows.
+    """
+    clauses, params = _time_filter(since, until, "l.timestamp")
+    clauses.insert(0, "logs_fts MATCH ?")
+    params.insert(0, text)
+    where = " AND ".join(clauses)
+    if sessions:
+        columns = ["session", "first_match", "matches"]
+        sql = (f"SELECT l.session, MIN(l.timestamp), COUNT(*) "
+               f"FROM logs_fts JOIN logs AS l ON l.id = logs_fts.rowid WHERE {where} "
+               "GROUP BY l.session ORDER BY MIN(l.timestamp)")
+    else:
+        columns = LOG_COLUMNS
+        sql = (f"SELECT {', '.join('l.' + c for c in LOG_COLUMNS)} "
+               f"FROM logs_fts JOIN logs_full AS l ON l.id = logs_fts.rowid WHERE {where} "
+               "ORDER BY logs_fts.rank")
+    if limit:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return columns, conn.execute(sql, params)
+
+
+def write_csv(columns, rows, out):
+    writer = csv.writer(out)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow(row)
+
+
+def write_json(columns, rows, out):
+    """Write a JSON array one object at a time."""
+    out.write("[")
+    for i, row in enumerate(rows):
+        out.write(",\n " if i else "\n ")
+        out.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False))
+    out.write("\n]\n")
+
+
+WRITERS = {"csv": write_csv, "json": write_json}
+
+
+def main(argv, db_path):
+    """Entry point for `machine.py stats`."""
+    parser = argparse.ArgumentParser(prog="machine.py stats")
+    parser.add_argument("--db", default=db_path, help="log database (default: %(default)s)")
+    sub = parser.add_subparsers(dest="query", required=True)
+
+    index = sub.add_parser("index", help="build the timestamp and full-text indexes")
+    index.add_argument("--rebuild", action="store_true",
+                       help="refill the full-text index from the logs table")
+
+    def add_common(p):
+        p.add_argument("--since", type=parse_time, help="ISO date/time, 'today' or 'yesterday'")
+        p.add_argument("--until", type=parse_time, help="exclusive upper bound, same formats")
+        p.add_argument("--format", choices=sorted(WRITERS), default="csv")
+
+    rng = sub.add_parser("range", help="log rows in a time range")
+    add_common(rng)
+    rng.add_argument("--command", help="only rows of this command")
+
+    counts = sub.add_parser("counts", help="rows per command")
+    add_common(counts)
+
+    search = sub.add_parser("search", help="full-text search over command and response")
+    search.add_argument("text", help="FTS5 query, e.g. 'chinese AND solved'")
+    add_common(search)
+    search.add_argument("--limit", type=int)
+    search.add_argument("--sessions", action="store_true",
+                        help="list matching sessions instead of rows")
+
+    args = parser.parse_args(argv)
+    conn = sqlite3.connect(args.db)
+    try:
+        build_indexes(conn, rebuild=args.query == "index" and args.rebuild)
+        if args.query == "index":
+            print(f"Indexes ready in {args.db}")
+            return
+        if args.query == "range":
+            columns, rows = query_range(conn, args.since, args.until, args.command)
+        elif args.query == "counts":
+            columns, rows = query_counts(conn, args.since, args.until)
+        else:
+            columns, rows = query_search(conn, args.text, args.since, args.until,
+                                         args.limit, args.sessions)
+        WRITERS[args.format](columns, rows, sys.stdout)
+    except sqlite3.OperationalError as e:
+        # Mostly malformed FTS5 queries; show them without a traceback.
+        parser.exit(1, f"machine.py stats: {e}\n")
+    finally:
+        conn.close()
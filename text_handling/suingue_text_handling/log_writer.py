@@ -0,0 +1,250 @@
+"""
+Write-behind logger for THE MACHINE's operator log database.
+
+Log events are queued in memory and written by a background thread in
+batched transactions, so the operator prompt never waits on a disk sync.
+Nothing touches the database until the first row is logged, which keeps
+startup fast.
+"""
+import atexit
+import queue
+import threading
+import time
+
+# Maps the durability switch to SQLite's synchronous pragma.
+#   off    - never fsync; fastest, a power cut may lose the last batches.
+#   normal - WAL + fsync at checkpoints; a crash of the process loses only the
+#            rows still queued in memory (up to flush_interval / batch_size).
+#   full   - fsync on every batch commit.
+DURABILITY_LEVELS = {
+    "off": "OFF",
+    "normal": "NORMAL",
+    "full": "FULL",
+}
+
+# New rows keep their response inline; log_retention.py later moves repeated
+# responses into `texts` and points response_id at them.
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT NOT NULL,
+        command TEXT,
+        response TEXT,
+        session TEXT,
+        response_id INTEGER REFERENCES texts (id)
+    );
+    CREATE TABLE IF NOT EXISTS texts (
+        id INTEGER PRIMARY KEY,
+        hash BLOB NOT NULL UNIQUE,
+        body TEXT NOT NULL
+    );
+'''
+
+# Columns added after the first release, created on old databases when opened.
+MIGRATIONS = {
+    "session": "ALTER TABLE logs ADD COLUMN session TEXT",
+    "response_id": "ALTER TABLE logs ADD COLUMN response_id INTEGER REFERENCES texts (id)",
+}
+
+# Read logs through this view to get the response whether or not it was interned.
+VIEWS = '''
+    CREATE VIEW IF NOT EXISTS logs_full AS
+        SELECT logs.id, logs.timestamp, logs.session, logs.command,
+               COALESCE(logs.response, texts.body) AS response
+        FROM logs LEFT JOIN texts ON texts.id = logs.response_id;
+'''
+
+
+def ensure_schema(conn):
+    """Create or upgrade the log tables and views on conn."""
+    conn.executescript(SCHEMA)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(logs)")}
+    for column, statement in MIGRATIONS.items():
+        if column not in columns:
+            conn.execute(statement)
+    conn.executescript(VIEWS)
+    conn.commit()
+
+
+class _Barrier:
+    """Queue marker: commit everything before it, then wake up the caller."""
+
+    def __init__(self, checkpoint=False):
+        self.checkpoint = checkpoint
+        self.done = threading.Event()
+
+
+_STOP = object()
+
+# Pauses before retrying a batch that failed with sqlite3.OperationalError
+# ("database is locked" while a VACUUM or another writer holds the lock; each
+# attempt already waits sqlite3's 5 s busy timeout). After the last one the
+# writer gives up and log()/flush() raise.
+RETRY_DELAYS = (0.1, 0.5, 2.0, 5.0)
+
+
+class LogWriter:
+    """
+    Queue log rows in memory and insert them from a background thread.
+
+    A batch is committed when it reaches `batch_size` rows or when the
+    oldest queued row is `flush_interval` seconds old, whichever comes first.
+    """
+
+    def __init__(self, path, batch_size=256, flush_interval=0.5, durability="normal"):
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError(f"Unknown durability level {durability!r}; "
+                             f"expected one of {', '.join(DURABILITY_LEVELS)}")
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.durability = durability
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = None
+        self._start_lock = threading.Lock()
+        # Held while queuing, while closing and while the writer thread dies,
+        # so nothing is queued after _STOP or after the last drain.
+        self._state_lock = threading.Lock()
+        self._error = None
+        # Updated by the writer thread; read them after flush() for benchmarks.
+        self.rows_written = 0
+        self.batches_written = 0
+        self.commit_seconds = 0.0
+        self.retries = 0
+        atexit.register(self.close)
+
+    def log(self, timestamp, command, response, session=None):
+        """Queue one row; returns immediately. Safe to call from any thread."""
+        if self._thread is None:
+            self._start()
+        with self._state_lock:
+            if self._closed:
+                raise RuntimeError("LogWriter is closed")
+            self._check()
+            self._queue.put((timestamp, command, response, session))
+
+    def flush(self, timeout=None):
+        """Block until every row queued so far has been committed."""
+        return self._barrier(_Barrier(), timeout)
+
+    def sync(self, timeout=None):
+        """Flush, then checkpoint the WAL so the rows are in the main database file."""
+        return self._barrier(_Barrier(checkpoint=True), timeout)
+
+    def close(self):
+        """Flush what is left and stop the writer thread. Safe to call twice."""
+        with self._state_lock:
+            if self._closed:
+                return
+            self._closed = True
+            with self._start_lock:
+                thread = self._thread
+            if thread is not None:
+                self._queue.put(_STOP)
+        if thread is not None:
+            thread.join()
+
+    def _start(self):
+        """Start the writer thread; the database is opened there, on first use."""
+        with self._start_lock:
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self._thread.start()
+
+    def _check(self):
+        if self._error is not None:
+            raise RuntimeError(f"log writer stopped: {self._error}") from self._error
+
+    def _barrier(self, barrier, timeout):
+        with self._state_lock:
+            self._check()
+            if self._closed or self._thread is None:
+                # Nothing was ever queued.
+                return True
+            self._queue.put(barrier)
+        done = barrier.done.wait(timeout)
+        self._check()
+        return done
+
+    def _connect(self):
+        import sqlite3
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={DURABILITY_LEVELS[self.durability]}")
+        ensure_schema(conn)
+        return conn
+
+    def _run(self):
+        self._item = None
+        try:
+            self._loop()
+        except Exception as exc:
+            self._fail(exc)
+
+    def _fail(self, exc):
+        """The thread is dying: refuse new rows and wake up everyone waiting."""
+        with self._state_lock:
+            self._error = exc
+            if isinstance(self._item, _Barrier):
+                self._item.done.set()  # taken off the queue but not handled
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if isinstance(item, _Barrier):
+                    item.done.set()
+
+    def _retrying(self, action):
+        import sqlite3
+        for delay in RETRY_DELAYS:
+            try:
+                return action()
+            except sqlite3.OperationalError:
+                self.retries += 1
+                time.sleep(delay)
+        return action()
+
+    def _loop(self):
+        conn = self._connect()
+        try:
+            pending = []
+            deadline = None
+            while True:
+                timeout = None if not pending else max(0.0, deadline - time.monotonic())
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+                self._item = item
+
+                if isinstance(item, tuple):
+                    if not pending:
+                        deadline = time.monotonic() + self.flush_interval
+                    pending.append(item)
+                    if len(pending) < self.batch_size:
+                        continue
+
+                # Size or time limit reached, or a control marker arrived.
+                if pending:
+                    self._retrying(lambda: self._commit(conn, pending))
+                    pending = []
+                if isinstance(item, _Barrier):
+                    if item.checkpoint:
+                        self._retrying(lambda: conn.execute("PRAGMA wal_checkpoint(FULL)"))
+                    item.done.set()
+                elif item is _STOP:
+                    break
+        finally:
+            conn.close()
+
+    def _commit(self, conn, rows):
+        start = time.perf_counter()
+        with conn:
+            conn.executemany(
+                "INSERT INTO logs (timestamp, command, response, session) VALUES (?, ?, ?, ?)",
+                rows)
+        self.commit_seconds += time.perf_counter() - start
+        self.rows_written += len(rows)
+        self.batches_written += 1
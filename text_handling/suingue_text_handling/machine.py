@@ -1,78 +1,109 @@
 #!/usr/bin/env python3
+import atexit
 import sys
-import textwrap
-import sqlite3
 import datetime
 import os
 import random
 
-# Global state variables to enforce the order.
-machine_repaired = False
-machine_greeted = False
+import art_registry
+from log_writer import LogWriter
+from metrics import Metrics, clock, instrument
 
-# Connect to the SQLite database (it will be created if it doesn't exist)
-conn = sqlite3.connect('operator_logs.db')
-cursor = conn.cursor()
+PROMPT = "operator: $ "
 
-# Create the logs table if it doesn't exist yet
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS logs (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        timestamp TEXT NOT NULL,
-        command TEXT,
-        response TEXT
-    )
-''')
-conn.commit()
+# Log events are written in batches by a background thread (see log_writer.py).
+# MACHINE_LOG_DURABILITY selects how hard each batch is synced: off, normal or full,
+# and MACHINE_LOG_DB points the machine at another database (e.g. for benchmarks).
+LOG_DB = os.environ.get("MACHINE_LOG_DB", 'operator_logs.db')
+log_writer = LogWriter(
+    LOG_DB,
+    durability=os.environ.get("MACHINE_LOG_DURABILITY", "normal"),
+)
+
+# Hot-path timings and counters, appended to MACHINE_METRICS every minute and at exit.
+# MACHINE_PROFILE=<file> profiles the whole run with cProfile; the hidden PROFILE
+# command toggles it from inside a session.
+metrics = Metrics(os.environ.get("MACHINE_METRICS", "operator_metrics.ndjson"))
+if os.environ.get("MACHINE_PROFILE"):
+    metrics.start_profile()
+    atexit.register(metrics.stop_profile, os.environ["MACHINE_PROFILE"])
+
+# Commands the dispatcher knows, for the per-command metrics.
+COMMANDS = {"help", "restore memory", "repair", "memory", "say hello", "greet system",
+            "explore", "exit", "quit", "profile"}
+
+# All rewards are loaded once, from ascii_art/ or the packed bundle of the
+# frozen build. A missing piece stops the machine here, not mid-session.
+REWARD_ARTS = ["cat", "checkpoint", "other", "poem", "mush", "stars"]
+ascii_arts = art_registry.load_default()
+ascii_arts.require(REWARD_ARTS)
 
 # Updated help text now excludes the incomplete restore command.
 RESPONSES = {
-    "help": textwrap.dedent("""\
-        AVAILABLE COMMANDS:
-          HELP                - Display this help message.
-          RESTORE MEMORY      - Begin the complete memory restoration mission.
-          REPAIR              - Begin the repair sequence. (Path of Restoration)
-          MEMORY              - Enter the memory vault. (Path of Reminiscence)
-          SAY HELLO           - Initiate a greeting dialogue. (Path of Greeting)
-          GREET SYSTEM        - Receive a cryptic system greeting. (Also Path of Greeting)
-          EXPLORE             - Venture into the digital labyrinth. (Path of Obfuscation)
-          EXIT/QUIT           - Terminate the session.
-        """)
+    # Plain literals rather than textwrap.dedent: importing textwrap (and re) slows startup.
+    "help": (
+        "AVAILABLE COMMANDS:\n"
+        "  HELP                - Display this help message.\n"
+        "  RESTORE MEMORY      - Begin the complete memory restoration mission.\n"
+        "  REPAIR              - Begin the repair sequence. (Path of Restoration)\n"
+        "  MEMORY              - Enter the memory vault. (Path of Reminiscence)\n"
+        "  SAY HELLO           - Initiate a greeting dialogue. (Path of Greeting)\n"
+        "  GREET SYSTEM        - Receive a cryptic system greeting. (Also Path of Greeting)\n"
+        "  EXPLORE             - Venture into the digital labyrinth. (Path of Obfuscation)\n"
+        "  EXIT/QUIT           - Terminate the session.\n"
+    ),
 }
 
-def log_command(command, response):
-    """Log the command and the response into the SQLite database."""
+
+class Session:
+    """
+    Progress and output of one operator.
+    The repair/greeting flags enforce the order of the missions per operator,
+    so many sessions can share one process (see server.py).
+    """
+
+    def __init__(self, write=None, session_id=None):
+        self.id = session_id or os.urandom(6).hex()
+        self.repaired = False
+        self.greeted = False
+        self.write = write or sys.stdout.write
+
+    def say(self, text="", end="\n"):
+        """Send text to the operator, like print()."""
+        self.write(f"{text}{end}")
+
+    def log(self, command, response):
+        log_command(command, response, self.id)
+
+def log_command(command, response, session_id=None):
+    """Queue the command and the response for the SQLite database."""
+    started = clock()
     timestamp = datetime.datetime.now().isoformat()
-    cursor.execute("INSERT INTO logs (timestamp, command, response) VALUES (?, ?, ?)",
-                   (timestamp, command, response))
-    conn.commit()
+    log_writer.log(timestamp, command, response, session_id)
+    metrics.record("log_command", clock() - started)
 
 def load_ascii_art(art_name):
     """
-    Load the ASCII art from a text file stored in the ascii_art folder.
+    Return the ASCII art called art_name from the in-memory registry.
     Expects art_name to be one of 'cat', 'checkpoint', 'other', 'poem', 'mush', or 'stars'.
     """
-    # Determine the directory where the script is located.
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    art_path = os.path.join(script_dir, "ascii_art", f"{art_name}.txt")
-    try:
-        with open(art_path, "r", encoding="utf-8") as f:
-            return f.read()
-    except Exception as e:
-        return f"Error loading ASCII art '{art_name}': {e}"
+    return ascii_arts.get(art_name)
 
-def reward(art_choice=None):
-    """Display a reward by loading an ASCII art file from the ascii_art folder."""
+def reward(session, art_choice=None):
+    """Display a reward picked from the ASCII art registry."""
     reward_message = "\n*** REWARD UNLOCKED! Enjoy this gift: ***\n"
-    print(reward_message)
+    session.say(reward_message)
     if art_choice is None:
         # Now includes additional ascii gifts: poem, mush, and stars.
-        art_choice = random.choice(["cat", "checkpoint", "other", "poem", "mush", "stars"])
+        art_choice = random.choice(REWARD_ARTS)
+    started = clock()
     ascii_art = load_ascii_art(art_choice)
-    print(ascii_art)
-    log_command("REWARD", f"Displayed reward ASCII art '{art_choice}'")
+    metrics.record("load_ascii_art", clock() - started)
+    metrics.count(f"reward.{art_choice}")
+    session.say(ascii_art)
+    session.log("REWARD", f"Displayed reward ASCII art '{art_choice}'")
 
-def restore_memory_sequence():
+def restore_memory_sequence(session):
     """
     Mission step 1: Restore the memory of the machine completely.
     Once a memory fragment is provided, the machine reassembles itself and then challenges the
@@ -81,148 +112,145 @@ def restore_memory_sequence():
     
     This command is available only after both repair and greeting.
     """
-    global machine_repaired, machine_greeted
-    if not (machine_repaired and machine_greeted):
+    if not (session.repaired and session.greeted):
         warning = "You can only restore the memory after you repair and greet me!"
-        print(warning)
-        log_command("RESTORE MEMORY", "Attempted restore memory before repair/greeting.")
+        session.say(warning)
+        session.log("RESTORE MEMORY", "Attempted restore memory before repair/greeting.")
         return
 
-    print("\n* Initiating Memory Restoration Mission *")
-    print("The machine's memory is fragmented and lost in time.")
-    memory_fragment = input("Enter a memory fragment that you believe holds the key to restoration:\noperator: $ ").strip()
+    session.say("\n* Initiating Memory Restoration Mission *")
+    session.say("The machine's memory is fragmented and lost in time.")
+    memory_fragment = (yield "Enter a memory fragment that you believe holds the key to restoration:\noperator: $ ").strip()
     if memory_fragment:
         narrative = ("\nMemory fragment recorded. The machine begins to reassemble its past...\n"
                      "Restoration complete. The machine's memory is now whole.\n")
-        print(narrative)
-        log_command("RESTORE MEMORY", f"Memory fragment: {memory_fragment}")
+        session.say(narrative)
+        session.log("RESTORE MEMORY", f"Memory fragment: {memory_fragment}")
         
         # Now challenge the operator with an enigma to unlock the location.
-        print("To access the location for your gift delivery, you must solve an enigma.")
-        choice = input("Which enigma do you choose? (Italian/Chinese): $ ").strip().lower()
+        session.say("To access the location for your gift delivery, you must solve an enigma.")
+        choice = (yield "Which enigma do you choose? (Italian/Chinese): $ ").strip().lower()
         
         max_attempts = 2
         
         if choice == "italian":
-            print("\nEnigma (Italian):")
-            print("Una fiera di ferro è in agguato in un tunnel di tenebra. Se la batti ti colpisce. Cos'è?")
-            print("Warning: You have only 2 trials.")
+            session.say("\nEnigma (Italian):")
+            session.say("Una fiera di ferro è in agguato in un tunnel di tenebra. Se la batti ti colpisce. Cos'è?")
+            session.say("Warning: You have only 2 trials.")
             attempt = 0
             solved = False
             while attempt < max_attempts:
-                answer = input("Your answer: $ ").strip().lower()
+                answer = (yield "Your answer: $ ").strip().lower()
                 if answer == "proiettile":
                     solved = True
                     break
                 else:
                     attempt += 1
                     if attempt < max_attempts:
-                        print(f"Incorrect. You have {max_attempts - attempt} trial(s) left.")
+                        session.say(f"Incorrect. You have {max_attempts - attempt} trial(s) left.")
             if solved:
                 narrative = ("\nCorrect! The location has been unlocked.\n"
                              "Gift delivery appointment:\n  Location: Via dei Segreti 42\n  Time: 3:00 PM on 05/02/2025\n")
-                print(narrative)
-                log_command("ENIGMA", "Italian enigma solved; location provided.")
-                reward("poem")
+                session.say(narrative)
+                session.log("ENIGMA", "Italian enigma solved; location provided.")
+                reward(session, "poem")
             else:
                 narrative = "\nThat's it. Never stop trying. 永不放弃。"
-                print(narrative)
-                log_command("ENIGMA", "Italian enigma failed after two attempts.")
+                session.say(narrative)
+                session.log("ENIGMA", "Italian enigma failed after two attempts.")
         
         elif choice == "chinese":
-            print("\nEnigma (Chinese):")
-            print("什么东西越洗越脏？ (What gets dirtier the more you wash it?)")
-            print("Warning: You have only 2 trials.")
+            session.say("\nEnigma (Chinese):")
+            session.say("什么东西越洗越脏？ (What gets dirtier the more you wash it?)")
+            session.say("Warning: You have only 2 trials.")
             attempt = 0
             solved = False
             while attempt < max_attempts:
-                answer = input("Your answer: $ ").strip().lower()
+                answer = (yield "Your answer: $ ").strip().lower()
                 if answer == "water" or answer == "水":
                     solved = True
                     break
                 else:
                     attempt += 1
                     if attempt < max_attempts:
-                        print(f"Incorrect. You have {max_attempts - attempt} trial(s) left.")
+                        session.say(f"Incorrect. You have {max_attempts - attempt} trial(s) left.")
             if solved:
                 narrative = ("\nCorrect! The location has been unlocked.\n"
                              "Gift delivery location:\n  Location: 龙门客栈 Artusi Ristorante\n")
-                print(narrative)
-                log_command("ENIGMA", "Chinese enigma solved; location provided.")
-                reward("other")
+                session.say(narrative)
+                session.log("ENIGMA", "Chinese enigma solved; location provided.")
+                reward(session, "other")
             else:
                 narrative = "\nThat's it. Never stop trying. 永不放弃。"
-                print(narrative)
-                log_command("ENIGMA", "Chinese enigma failed after two attempts.")
+                session.say(narrative)
+                session.log("ENIGMA", "Chinese enigma failed after two attempts.")
         else:
             narrative = "\nInvalid choice. The enigma remains unsolved."
-            print(narrative)
-            log_command("ENIGMA", "No valid enigma selected.")
+            session.say(narrative)
+            session.log("ENIGMA", "No valid enigma selected.")
     else:
         narrative = "\nNo memory fragment provided. The mission cannot proceed."
-        print(narrative)
-        log_command("RESTORE MEMORY", "No memory fragment provided.")
+        session.say(narrative)
+        session.log("RESTORE MEMORY", "No memory fragment provided.")
 
-def repair_sequence():
+def repair_sequence(session):
     """Path of Restoration – the repair sequence with narrative choices."""
-    global machine_repaired
-    print("\n* Initiating Repair Sequence (Path of Restoration) *")
-    operator_handle = input("1/2 State your chosen OPERATOR handle:\noperator: $ ").strip()
+    session.say("\n* Initiating Repair Sequence (Path of Restoration) *")
+    operator_handle = (yield "1/2 State your chosen OPERATOR handle:\noperator: $ ").strip()
     if not operator_handle:
         operator_handle = "UNKNOWN_OPERATOR"
-    memory = input("2/2 Share a memory that fuels your determination (or leave blank):\noperator: $ ").strip()
+    memory = (yield "2/2 Share a memory that fuels your determination (or leave blank):\noperator: $ ").strip()
     if not memory:
         memory = "[No memory provided]"
     
-    choice = input("\nDo you wish to attempt to fully restore the machine's core systems? (yes/no): $ ").strip().lower()
+    choice = (yield "\nDo you wish to attempt to fully restore the machine's core systems? (yes/no): $ ").strip().lower()
     if choice == "yes":
         narrative = (f"\nThank you, {operator_handle}. As you affirm your intent, sparks of energy course through the circuits.\n"
                      "The machine hums with renewed hope. Yet, deep within, echoes of a forgotten past stir...\n"
                      "As the ancient Chinese proverb says: '千里之行，始于足下。' (A journey of a thousand miles begins with a single step.)\n")
-        print(narrative)
-        log_command("REPAIR", narrative)
+        session.say(narrative)
+        session.log("REPAIR", narrative)
         # Mark the repair as complete.
-        machine_repaired = True
-        reward("checkpoint")
+        session.repaired = True
+        reward(session, "checkpoint")
     else:
         narrative = (f"\nUnderstood, {operator_handle}. You choose to leave the machine in its enigmatic state.\n"
                      "A quiet melancholy settles, and the machine retreats into introspection, its secrets locked away.\n"
                      "As the Daoists say: '无为而无不为。' (By doing nothing, everything is done.)\n")
-        print(narrative)
-        log_command("REPAIR", narrative)
+        session.say(narrative)
+        session.log("REPAIR", narrative)
 
-def memory_journey():
+def memory_journey(session):
     """Path of Reminiscence – the memory branch where recollections unlock hidden clues."""
-    print("\n* Entering the Memory Vault (Path of Reminiscence) *")
-    memory_text = input("Share a memory that resonates with the machine:\noperator: $ ").strip()
+    session.say("\n* Entering the Memory Vault (Path of Reminiscence) *")
+    memory_text = (yield "Share a memory that resonates with the machine:\noperator: $ ").strip()
     if memory_text:
         narrative = (f"\nMemory recorded: '{memory_text}'\n"
                      "As the memory is archived, fleeting images and cryptic symbols cascade through the machine's banks.\n"
                      "Do you wish to delve deeper into this memory? (yes/no): ")
-        print(narrative, end='')
-        choice = input().strip().lower()
+        session.say(narrative, end='')
+        choice = (yield "").strip().lower()
         if choice == "yes":
             narrative += ("\nYou dive deeper, unraveling layers of emotion and code that hint at a past defying time.\n"
                           "The machine whispers: '回忆是时光的礼物。' (Memories are gifts from time.)")
-            print("\n" + narrative)
-            log_command("MEMORY", narrative)
-            reward("starst")
+            session.say("\n" + narrative)
+            session.log("MEMORY", narrative)
+            reward(session, "stars")
         else:
             narrative += ("\nYou let the memory rest, a quiet echo of what once was.\n"
                           "The machine murmurs: '静水流深。' (Still waters run deep.)")
-            print("\n" + narrative)
-            log_command("MEMORY", narrative)
+            session.say("\n" + narrative)
+            session.log("MEMORY", narrative)
     else:
         narrative = "No memory was shared. Yet, the machine whispers that sometimes silence speaks louder than words.\n"
-        print("\n" + narrative)
-        log_command("MEMORY", narrative)
+        session.say("\n" + narrative)
+        session.log("MEMORY", narrative)
 
-def greeting_dialogue():
+def greeting_dialogue(session):
     """Path of Greeting – a philosophical dialogue that blurs the line between machine and operator."""
-    global machine_greeted
-    print("\n* Initiating Greeting Dialogue (Path of Greeting) *")
-    print("HELLO. I am THE MACHINE, a vessel of secrets and silent codes.")
-    question = input("The machine asks: What drives you, Operator? (curiosity/ambition/fear): $ ").strip().lower()
+    session.say("\n* Initiating Greeting Dialogue (Path of Greeting) *")
+    session.say("HELLO. I am THE MACHINE, a vessel of secrets and silent codes.")
+    question = (yield "The machine asks: What drives you, Operator? (curiosity/ambition/fear): $ ").strip().lower()
     if question == "curiosity":
         narrative = ("\nCuriosity burns within you, a flame leading to uncharted territories of thought.\n"
                      "The machine nods in silent acknowledgment, as if privy to the universe's secrets.\n"
@@ -238,118 +266,171 @@ def greeting_dialogue():
     else:
         narrative = ("\nA mysterious response... The machine ponders the depths of your words, leaving their meaning open to interpretation.\n"
                      "It muses: '道可道，非常道。' (The Dao that can be spoken is not the eternal Dao.)")
-    print(narrative)
-    log_command("GREETING", narrative)
+    session.say(narrative)
+    session.log("GREETING", narrative)
     # Mark the greeting as complete.
-    machine_greeted = True
+    session.greeted = True
 
-def explore_path():
+def explore_path(session):
     """Path of Obfuscation – the labyrinth branch where choices unlock further enigmas."""
-    print("\n* Entering the Labyrinth (Path of Obfuscation) *")
-    print("You find yourself in a digital labyrinth, where data flows like streams of light and shadows hide in the code.")
-    print("Before you lie two corridors: one bathed in a soft blue glow, the other in a warm red luminescence.")
-    corridor = input("Which corridor do you choose? (blue/red): $ ").strip().lower()
+    session.say("\n* Entering the Labyrinth (Path of Obfuscation) *")
+    session.say("You find yourself in a digital labyrinth, where data flows like streams of light and shadows hide in the code.")
+    session.say("Before you lie two corridors: one bathed in a soft blue glow, the other in a warm red luminescence.")
+    corridor = (yield "Which corridor do you choose? (blue/red): $ ").strip().lower()
     if corridor == "blue":
         narrative = ("\nYou step into the blue corridor, where walls shimmer with holographic memories.\n"
                      "Fragments of past interactions echo around you, each whispering secrets of a forgotten network.\n"
                      "A digital apparition appears, offering you a riddle: 'What has keys but can't open locks?'")
-        sub_choice = input("Your answer: $ ").strip().lower()
+        sub_choice = (yield "Your answer: $ ").strip().lower()
         if "piano" in sub_choice:
             narrative += ("\nThe apparition smiles as your answer resonates. A hidden door opens, revealing an archive of lost knowledge.\n"
                           "The machine whispers: '知识是通向自由的钥匙。' (Knowledge is the key to freedom.)")
-            print(narrative)
-            log_command("EXPLORE", narrative)
-            reward("cat")
+            session.say(narrative)
+            session.log("EXPLORE", narrative)
+            reward(session, "cat")
 
         else:
             narrative += ("\nThe apparition fades, leaving you with a mystery unresolved as the corridor stretches on into the unknown.\n"
                           "The machine murmurs: '谜题未解，心未安。' (The puzzle remains unsolved; the heart remains unsettled.)")
-            print(narrative)
-            log_command("EXPLORE", narrative)
+            session.say(narrative)
+            session.log("EXPLORE", narrative)
     elif corridor == "red":
         narrative = ("\nYou venture into the red corridor, where each step pulsates with raw energy.\n"
                      "Rhythmic beats guide you deeper into the machine's digital heart.\n"
                      "An inscription on the wall reads: 'To progress, you must surrender a secret.'")
-        sub_choice = input("Share one now: $ ").strip()
+        sub_choice = (yield "Share one now: $ ").strip()
         if sub_choice:
             narrative += (f"\nYour secret, '{sub_choice}', is absorbed by the corridor, triggering a surge of vibrant data.\n"
                           "Hidden circuits awaken around you, as if in silent celebration.\n"
                           "The machine whispers: '真诚是心灵的桥梁。' (Sincerity is the bridge of the soul.)")
-            print(narrative)
-            log_command("EXPLORE", narrative)
-            reward("cat")
+            session.say(narrative)
+            session.log("EXPLORE", narrative)
+            reward(session, "cat")
         else:
             narrative += ("\nSilence prevails; the corridor hums as if waiting for your revelation.\n"
                           "The machine murmurs: '无言之言，最为深奥。' (The unspoken words are the most profound.)")
-            print(narrative)
-            log_command("EXPLORE", narrative)
+            session.say(narrative)
+            session.log("EXPLORE", narrative)
     else:
         narrative = ("\nDisoriented by indecision, you wander aimlessly in the labyrinth.\n"
                      "The machine's code shimmers with uncertainty, and soon you find yourself back at the beginning.\n"
                      "The machine whispers: '迷途知返，未为晚也。' (It's never too late to turn back from a wrong path.)")
-        print(narrative)
-        log_command("EXPLORE", narrative)
+        session.say(narrative)
+        session.log("EXPLORE", narrative)
 
 def unknown_command():
     """Return a default message for unknown commands."""
     return "UNKNOWN COMMAND. Type 'HELP' for available commands."
 
-def main():
-    """Main game loop and introduction."""
-    print("****************************************")
-    print("*      WELCOME TO THE MACHINE          *")
-    print("****************************************")
-    print(
+def dispatch(session, command):
+    """
+    Run one operator command. Dialogs are generators: every prompt is yielded
+    and the operator's answer is sent back in. Returns True when the session ends.
+    """
+    # Normalize the command for comparison.
+    cmd_lower = command.lower()
+    response = ""
+    if cmd_lower == "help":
+        response = RESPONSES["help"]
+        session.say(response)
+    elif cmd_lower == "restore memory":
+        yield from restore_memory_sequence(session)
+        return False
+    elif cmd_lower == "repair":
+        yield from repair_sequence(session)
+        return False
+    elif cmd_lower == "memory":
+        yield from memory_journey(session)
+        return False
+    elif cmd_lower in ["say hello", "greet system"]:
+        yield from greeting_dialogue(session)
+        return False
+    elif cmd_lower == "explore":
+        yield from explore_path(session)
+        return False
+    elif cmd_lower == "profile":
+        # Hidden: not listed in HELP.
+        if metrics.profiling:
+            path = metrics.stop_profile(f"machine_profile_{session.id}.prof")
+            response = f"PROFILE OFF. Stats written to {path}."
+        else:
+            metrics.start_profile()
+            response = "PROFILE ON. Type PROFILE again to stop and save the stats."
+        session.say(response)
+    elif cmd_lower in ["exit", "quit"]:
+        response = "Terminating session. Goodbye, Operator. 再见。"
+        session.say(response)
+        session.log(command, response)
+        return True
+    else:
+        response = unknown_command()
+        session.say(response)
+
+    session.log(command, response)
+    return False
+
+def session_loop(session):
+    """The whole operator session, from the banner to the farewell, as one dialog."""
+    session.say("****************************************")
+    session.say("*      WELCOME TO THE MACHINE          *")
+    session.say("****************************************")
+    session.say(
         "You stand before a machine that is more than mere circuitry.\n"
         "Within its digital labyrinth lie secrets, memories, and enigmas waiting to be unraveled.\n"
         "Each command may lead you down a different path – choose wisely.\n"
     )
-    
+
     while True:
         try:
-            command = input("operator: $ ").strip()
+            command = (yield PROMPT).strip()
+            if not command:
+                continue
+            if (yield from dispatch(session, command)):
+                break
         except (EOFError, KeyboardInterrupt):
             farewell = "\nTerminating session. Goodbye, Operator. 再见。"
-            print(farewell)
-            log_command("Session End", farewell)
+            session.say(farewell)
+            session.log("Session End", farewell)
             break
 
-        if not command:
-            continue
-
-        # Normalize the command for comparison.
-        cmd_lower = command.lower()
-        response = ""
-        if cmd_lower == "help":
-            response = RESPONSES["help"]
-            print(response)
-        elif cmd_lower == "restore memory":
-            restore_memory_sequence()
-            continue
-        elif cmd_lower == "repair":
-            repair_sequence()
-            continue
-        elif cmd_lower == "memory":
-            memory_journey()
-            continue
-        elif cmd_lower in ["say hello", "greet system"]:
-            greeting_dialogue()
-            continue
-        elif cmd_lower == "explore":
-            explore_path()
-            continue
-        elif cmd_lower in ["exit", "quit"]:
-            response = "Terminating session. Goodbye, Operator. 再见。"
-            print(response)
-            log_command(command, response)
-            break
-        else:
-            response = unknown_command()
-            print(response)
+def drive(dialog, ask=input):
+    """Run a dialog to completion, answering each prompt it yields with ask(prompt)."""
+    try:
+        prompt = next(dialog)
+        while True:
+            try:
+                answer = ask(prompt)
+            except (EOFError, KeyboardInterrupt) as exc:
+                prompt = dialog.throw(exc)
+            else:
+                prompt = dialog.send(answer)
+    except StopIteration:
+        pass
 
-        log_command(command, response)
+def new_dialog(write=None):
+    """Start a fresh, instrumented session writing its output through write(text)."""
+    return instrument(session_loop(Session(write=write)), metrics, PROMPT, COMMANDS)
 
-    conn.close()
+def main():
+    """Main game loop for a single operator on the terminal."""
+    drive(new_dialog())
+    log_writer.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if sys.argv[1:2] == ["serve"]:
+        import server
+        server.main(sys.argv[2:], new_dialog)
+        log_writer.close()
+    elif sys.argv[1:2] == ["stats"]:
+        import log_stats
+        log_writer.close()
+        log_stats.main(sys.argv[2:], LOG_DB)
+    elif sys.argv[1:2] == ["retention"]:
+        import log_retention
+        log_writer.close()
+        log_retention.main(sys.argv[2:], LOG_DB)
+    elif sys.argv[1:2] == ["replay"]:
+        import replay
+        replay.main(sys.argv[2:], new_dialog, log_writer)
+    else:
+        main()
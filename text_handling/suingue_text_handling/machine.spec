@@ -1,38 +1,90 @@
 # -*- mode: python ; coding: utf-8 -*-
+import os
+import sys
 
+# Pack ascii_art/ into one memory-mapped bundle shipped inside the binary. It is
+# written under the build's workpath: a bundle next to the sources would also be
+# picked up by art_registry.load_default() when running from source.
+sys.path.insert(0, SPECPATH)
+from art_registry import BUNDLE_NAME, pack_bundle
+os.makedirs(workpath, exist_ok=True)
+BUNDLE_PATH = os.path.join(workpath, BUNDLE_NAME)
+pack_bundle(os.path.join(SPECPATH, 'ascii_art'), BUNDLE_PATH)
+
+# MACHINE_ONEDIR=1 builds dist/machine/ instead of a single file. A one-dir build
+# starts faster: nothing is unpacked to a temp dir on every launch.
+ONEDIR = os.environ.get('MACHINE_ONEDIR') == '1'
+
+# Stdlib packages the machine never imports (checked for the terminal, serve,
+# stats, retention and replay modes). Leaving them out shrinks the PYZ archive.
+EXCLUDES = [
+    'tkinter', '_tkinter', 'turtle', 'turtledemo', 'idlelib', 'curses',
+    'unittest', 'doctest', 'pdb', 'pydoc', 'pydoc_data', 'test', 'lib2to3',
+    'distutils', 'setuptools', 'pip', 'ensurepip', 'venv', 'zipapp',
+    'email', 'http', 'urllib', 'xml', 'xmlrpc', 'html', 'mailbox',
+    'ftplib', 'smtplib', 'imaplib', 'poplib', 'multiprocessing', 'tomllib',
+]
 
 a = Analysis(
     ['machine.py'],
     pathex=[],
     binaries=[],
-    datas=[],
+    datas=[(BUNDLE_PATH, '.')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=EXCLUDES,
     noarchive=False,
     optimize=0,
 )
 pyz = PYZ(a.pure)
 
-exe = EXE(
-    pyz,
-    a.scripts,
-    a.binaries,
-    a.datas,
-    [],
-    name='machine',
-    debug=False,
-    bootloader_ignore_signals=False,
-    strip=False,
-    upx=True,
-    upx_exclude=[],
-    runtime_tmpdir=None,
-    console=True,
-    disable_windowed_traceback=False,
-    argv_emulation=False,
-    target_arch=None,
-    codesign_identity=None,
-    entitlements_file=None,
-)
+# UPX is off: decompressing the binaries costs more at startup than it saves on disk.
+if ONEDIR:
+    exe = EXE(
+        pyz,
+        a.scripts,
+        [],
+        exclude_binaries=True,
+        name='machine',
+        debug=False,
+        bootloader_ignore_signals=False,
+        strip=False,
+        upx=False,
+        console=True,
+        disable_windowed_traceback=False,
+        argv_emulation=False,
+        target_arch=None,
+        codesign_identity=None,
+        entitlements_file=None,
+    )
+    coll = COLLECT(
+        exe,
+        a.binaries,
+        a.datas,
+        strip=False,
+        upx=False,
+        name='machine',
+    )
+else:
+    exe = EXE(
+        pyz,
+        a.scripts,
+        a.binaries,
+        a.datas,
+        [],
+        name='machine',
+        debug=False,
+        bootloader_ignore_signals=False,
+        strip=False,
+        upx=False,
+        upx_exclude=[],
+        runtime_tmpdir=None,
+        console=True,
+        disable_windowed_traceback=False,
+        argv_emulation=False,
+        target_arch=None,
+        codesign_identity=None,
+        entitlements_file=None,
+    )
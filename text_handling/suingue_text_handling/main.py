@@ -1,7 +1,12 @@
-import ast
+import os
 
-with open("alunos.txt", "r") as alunos:
-    file = alunos.read().strip()
-    aluno_list = ast.literal_eval(file)
-    for aluno in aluno_list:
-        print(aluno)
\ No newline at end of file
+from roster import Roster, convert_literal
+
+# alunos.txt continua sendo a lista que a gente edita; alunos.ndjson (e o
+# índice alunos.ndjson.idx) é gerado a partir dela sempre que ela muda.
+if not os.path.exists("alunos.ndjson") or os.path.getmtime("alunos.ndjson") < os.path.getmtime("alunos.txt"):
+    convert_literal("alunos.txt", "alunos.ndjson")
+
+with Roster("alunos.ndjson") as alunos:
+    for aluno in alunos:
+        print(aluno["name"])
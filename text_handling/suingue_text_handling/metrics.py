@@ -0,0 +1,166 @@
+"""
+Low-overhead, in-process metrics for THE MACHINE.
+
+Timings go into log-scale histograms (about 12% resolution), counts into plain
+counters. A snapshot of everything is appended as one JSON line to the metrics
+file at most every `flush_interval` seconds and once more at exit, so real
+sessions of the frozen binary can be inspected without a debugger.
+
+    {"time": "...", "counters": {...}, "timings": {"log_command": {"count": ..,
+     "total_ms": .., "p50_ms": .., "p99_ms": .., "max_ms": ..}, ...}}
+"""
+import atexit
+import datetime
+import math
+import time
+
+clock = time.perf_counter
+
+# Sub-buckets per power of two.
+_SUB_BUCKETS = 4
+
+
+class Histogram:
+    """Counts of durations in log-scale buckets, plus count, total and max."""
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        mantissa, exponent = math.frexp(seconds * 1e6)
+        index = exponent * _SUB_BUCKETS + int((mantissa - 0.5) * 2 * _SUB_BUCKETS)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def percentile(self, fraction):
+        """Upper bound, in seconds, of the bucket holding the given fraction."""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                exponent, sub = divmod(index, _SUB_BUCKETS)
+                upper = 2.0 ** exponent * (0.5 + (sub + 1) / (2 * _SUB_BUCKETS))
+                return min(upper / 1e6, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "total_ms": round(self.total * 1000, 3),
+            "p50_ms": round(self.percentile(0.50) * 1000, 3),
+            "p99_ms": round(self.percentile(0.99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+class Metrics:
+    """Named histograms and counters, written now and then to an NDJSON file."""
+
+    def __init__(self, path=None, flush_interval=60.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.timings = {}
+        self.counters = {}
+        self._last_flush = clock()
+        self._profiler = None
+        if path:
+            atexit.register(self.flush)
+
+    def record(self, name, seconds):
+        histogram = self.timings.get(name)
+        if histogram is None:
+            histogram = self.timings[name] = Histogram()
+        histogram.record(seconds)
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def snapshot(self):
+        return {
+            "time": datetime.datetime.now().isoformat(),
+            "counters": dict(self.counters),
+            "timings": {name: h.summary() for name, h in sorted(self.timings.items())},
+        }
+
+    def maybe_flush(self, now):
+        """Flush if the last snapshot is older than flush_interval."""
+        if self.path and now - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Append a snapshot to the metrics file."""
+        import json
+        self._last_flush = clock()
+        if not self.path or not self.timings and not self.counters:
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(self.snapshot(), ensure_ascii=False) + "\n")
+
+    # -- profiling ---------------------------------------------------------
+
+    @property
+    def profiling(self):
+        return self._profiler is not None
+
+    def start_profile(self):
+        if self._profiler is None:
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def stop_profile(self, path):
+        """Stop profiling and dump the stats (readable with pstats or snakeviz)."""
+        if self._profiler is None:
+            return None
+        self._profiler.disable()
+        self._profiler.dump_stats(path)
+        self._profiler = None
+        return path
+
+
+def instrument(dialog, metrics, prompt, commands=()):
+    """
+    Pass a session dialog through unchanged while timing it.
+
+    For every command answered at `prompt` this records the machine's own work
+    ("command.<name>", input waits excluded) and counts the command; anything not
+    in `commands` is filed under "unknown". The time the operator takes to answer
+    any prompt goes to "input_wait".
+    """
+    command, work = None, 0.0
+    value, error = None, None
+    while True:
+        started = clock()
+        try:
+            shown = dialog.throw(error) if error is not None else dialog.send(value)
+        except StopIteration:
+            if command is not None:
+                metrics.record(f"command.{command}", work + clock() - started)
+            return
+        work += clock() - started
+        if shown == prompt and command is not None:
+            metrics.record(f"command.{command}", work)
+            metrics.maybe_flush(started)
+            command = None
+
+        waited = clock()
+        try:
+            value, error = (yield shown), None
+        except (EOFError, KeyboardInterrupt) as exc:
+            value, error = None, exc
+        metrics.record("input_wait", clock() - waited)
+
+        if shown == prompt and value and value.strip():
+            command, work = value.strip().lower(), 0.0
+            if command not in commands:
+                command = "unknown"
+            metrics.count(f"command.{command}")
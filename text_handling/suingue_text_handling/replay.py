@@ -0,0 +1,216 @@
+"""
+Headless replay and throughput benchmark for THE MACHINE.
+
+    python machine.py replay generate --sessions 10000 --out load.ndjson
+    MACHINE_LOG_DB=bench.db python machine.py replay run load.ndjson
+
+A transcript is an NDJSON file with one session per line:
+    {"inputs": ["repair", "ZERO", "", "yes", "say hello", "fear", "quit"]}
+`inputs` holds everything the operator types, commands and answers to every
+dialog prompt alike, in order. The sessions run through the same dialogs as
+the terminal and the server, with output sent to a sink instead of stdout.
+When a session runs out of inputs it ends as if the operator hit Ctrl-D.
+"""
+import argparse
+import json
+import random
+import time
+from collections import defaultdict
+
+# Same as machine.PROMPT: the prompt that waits for a new command.
+PROMPT = "operator: $ "
+
+KNOWN_COMMANDS = {"help", "restore memory", "repair", "memory", "say hello",
+                  "greet system", "explore", "exit", "quit"}
+
+
+def load_transcripts(path):
+    """Yield the input list of each session in an NDJSON transcript."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)["inputs"]
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+class ReplayStats:
+    """Per-command latencies of a replay, in seconds."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.sessions = 0
+        self.output_bytes = 0
+
+    @property
+    def commands(self):
+        return sum(len(values) for values in self.latencies.values())
+
+    def record(self, command, seconds):
+        key = command.lower() if command.lower() in KNOWN_COMMANDS else "<unknown>"
+        self.latencies[key].append(seconds)
+
+
+def replay_session(new_dialog, inputs, stats, clock=time.perf_counter):
+    """
+    Feed inputs to one session. A command's latency runs from the moment it is
+    sent until the machine is back at the operator prompt, so it covers every
+    dialog step and log call the command triggers.
+    """
+    def write(text):
+        stats.output_bytes += len(text)
+
+    dialog = new_dialog(write)
+    answers = iter(inputs)
+    command, started = None, 0.0
+    try:
+        prompt = next(dialog)
+        while True:
+            if prompt == PROMPT:
+                if command is not None:
+                    stats.record(command, clock() - started)
+                command = None
+            answer = next(answers, None)
+            if answer is None:
+                prompt = dialog.throw(EOFError)
+                continue
+            if prompt == PROMPT and answer.strip():
+                command, started = answer.strip(), clock()
+            prompt = dialog.send(answer)
+    except StopIteration:
+        if command is not None:
+            stats.record(command, clock() - started)
+    stats.sessions += 1
+
+
+def run(path, new_dialog, log_writer):
+    """Replay every session of path and return (stats, wall seconds, flush seconds)."""
+    stats = ReplayStats()
+    start = time.perf_counter()
+    for inputs in load_transcripts(path):
+        replay_session(new_dialog, inputs, stats)
+    replay_seconds = time.perf_counter() - start
+    log_writer.flush()
+    flush_seconds = time.perf_counter() - start - replay_seconds
+    return stats, replay_seconds, flush_seconds
+
+
+def print_report(stats, replay_seconds, flush_seconds, log_writer):
+    commands = stats.commands
+    print(f"sessions:      {stats.sessions}")
+    print(f"commands:      {commands}")
+    print(f"replay time:   {replay_seconds:.3f} s "
+          f"({commands / replay_seconds if replay_seconds else 0:,.0f} commands/s)")
+    print(f"flush wait:    {flush_seconds:.3f} s")
+    print(f"db rows:       {log_writer.rows_written} in {log_writer.batches_written} batches, "
+          f"{log_writer.commit_seconds:.3f} s committing")
+    print(f"output:        {stats.output_bytes:,} characters")
+    print()
+    print(f"{'command':<16}{'count':>9}{'p50 ms':>10}{'p99 ms':>10}")
+    for command, values in sorted(stats.latencies.items()):
+        values.sort()
+        print(f"{command:<16}{len(values):>9}"
+              f"{percentile(values, 0.50) * 1000:>10.3f}{percentile(values, 0.99) * 1000:>10.3f}")
+
+
+# Answers the synthetic operators pick from, per dialog prompt.
+HANDLES = ["ZERO", "NEO", "ADA", "", "operator_42"]
+MEMORIES = ["the first boot", "a rainy day in Porto", "", "suingue lessons"]
+UNKNOWN = ["dance", "open the pod bay doors", "sudo help", "42"]
+
+
+def _enigma_answers(rng, correct):
+    """Two tries at most: solve first, solve second, or fail twice."""
+    outcome = rng.random()
+    if outcome < 0.5:
+        return [correct]
+    if outcome < 0.75:
+        return ["no idea", correct]
+    return ["no idea", "still no idea"]
+
+
+def synthesize_session(rng, max_commands=20):
+    """Build a random but well-formed input list for one session."""
+    inputs = []
+    repaired = greeted = False
+    for _ in range(rng.randint(1, max_commands)):
+        command = rng.choice(["help", "repair", "say hello", "greet system", "memory",
+                              "explore", "restore memory", "unknown"])
+        if command == "unknown":
+            inputs.append(rng.choice(UNKNOWN))
+        elif command == "help":
+            inputs.append(rng.choice(["help", "HELP"]))
+        elif command == "repair":
+            choice = rng.choice(["yes", "yes", "no"])
+            inputs += ["repair", rng.choice(HANDLES), rng.choice(MEMORIES), choice]
+            repaired = repaired or choice == "yes"
+        elif command in ("say hello", "greet system"):
+            inputs += [command, rng.choice(["curiosity", "ambition", "fear", "boredom"])]
+            greeted = True
+        elif command == "memory":
+            memory = rng.choice(MEMORIES)
+            inputs += ["memory", memory]
+            if memory:
+                inputs.append(rng.choice(["yes", "no"]))
+        elif command == "explore":
+            corridor = rng.choice(["blue", "red", "green"])
+            inputs += ["explore", corridor]
+            if corridor == "blue":
+                inputs.append(rng.choice(["a piano", "a map"]))
+            elif corridor == "red":
+                inputs.append(rng.choice(["I like jazz", ""]))
+        elif command == "restore memory":
+            inputs.append("restore memory")
+            if repaired and greeted:
+                fragment = rng.choice(MEMORIES)
+                inputs.append(fragment)
+                if fragment:
+                    enigma = rng.choice(["italian", "chinese", "latin"])
+                    inputs.append(enigma)
+                    if enigma == "italian":
+                        inputs += _enigma_answers(rng, "proiettile")
+                    elif enigma == "chinese":
+                        inputs += _enigma_answers(rng, rng.choice(["water", "水"]))
+    # Most operators say goodbye; the rest just close the terminal.
+    if rng.random() < 0.9:
+        inputs.append(rng.choice(["quit", "exit"]))
+    return inputs
+
+
+def generate(path, sessions, seed=None, max_commands=20):
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        for _ in range(sessions):
+            inputs = synthesize_session(rng, max_commands)
+            f.write(json.dumps({"inputs": inputs}, ensure_ascii=False) + "\n")
+
+
+def main(argv, new_dialog, log_writer):
+    """Entry point for `machine.py replay`."""
+    parser = argparse.ArgumentParser(prog="machine.py replay")
+    sub = parser.add_subparsers(dest="action", required=True)
+
+    run_parser = sub.add_parser("run", help="replay a transcript and report throughput")
+    run_parser.add_argument("transcript")
+    run_parser.add_argument("--seed", type=int, help="seed for the random rewards")
+
+    gen_parser = sub.add_parser("generate", help="write a random transcript for load tests")
+    gen_parser.add_argument("--sessions", type=int, default=1000)
+    gen_parser.add_argument("--max-commands", type=int, default=20)
+    gen_parser.add_argument("--seed", type=int)
+    gen_parser.add_argument("--out", required=True)
+
+    args = parser.parse_args(argv)
+    if args.action == "generate":
+        generate(args.out, args.sessions, args.seed, args.max_commands)
+        print(f"Wrote {args.sessions} sessions to {args.out}")
+        return
+    if args.seed is not None:
+        random.seed(args.seed)
+    stats, replay_seconds, flush_seconds = run(args.transcript, new_dialog, log_writer)
+    print_report(stats, replay_seconds, flush_seconds, log_writer)
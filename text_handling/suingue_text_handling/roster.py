@@ -0,0 +1,264 @@
+"""
+Student roster stored as NDJSON plus a binary index, opened with mmap.
+
+alunos.txt is a Python literal (a list of names) that has to be parsed whole
+with ast.literal_eval before the first name can be used. A roster keeps one
+JSON record per line ({"id": 0, "name": "Claudinho"}) and a side index,
+<roster>.idx, with where every record starts and two hash tables, by id and
+by name. Both files are memory-mapped: opening a roster reads nothing,
+iterating decodes one record at a time and a lookup probes the hash table and
+decodes only the records it lands on.
+
+Index layout (native byte order):
+    32 bytes  magic (INDEX_MAGIC), record count, slots, size and mtime (ns) of
+              the NDJSON file
+    offsets   u64[count + 1], record i is data[offsets[i]:offsets[i + 1]]
+    hashes    u64[slots] by id, then u64[slots] by name
+    records   u32[slots] by id, then u32[slots] by name: record number + 1, 0 if free
+
+The tables use open addressing with linear probing and at least twice as many
+slots as records. An index that does not match the size and modification time
+of its NDJSON file (edited by hand, say) is rebuilt when the roster is opened.
+
+    python roster.py convert alunos.txt alunos.ndjson
+    python roster.py show alunos.ndjson --name Claudinho
+"""
+import argparse
+import ast
+import hashlib
+import json
+import mmap
+import os
+import struct
+from array import array
+
+INDEX_MAGIC = b"ROSTER02"
+_HEADER = struct.Struct("=8sIIQq")
+WRITE_BUFFER = 1 << 20
+
+
+def index_path(path):
+    return path + ".idx"
+
+
+def _key_hash(value):
+    key = json.dumps(value).encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+def _table(hashes, slots):
+    table_hashes = array("Q", bytes(8 * slots))
+    table_records = array("I", bytes(4 * slots))
+    mask = slots - 1
+    for record, h in enumerate(hashes):
+        slot = h & mask
+        while table_records[slot]:
+            slot = (slot + 1) & mask
+        table_hashes[slot] = h
+        table_records[slot] = record + 1
+    return table_hashes, table_records
+
+
+class _IndexBuilder:
+    """Collects record offsets and key hashes while an NDJSON file is written or read."""
+
+    def __init__(self):
+        self.offsets = array("Q")
+        self.ids = array("Q")
+        self.names = array("Q")
+        self.size = 0
+
+    def add(self, record, length):
+        self.offsets.append(self.size)
+        self.ids.append(_key_hash(record.get("id")))
+        self.names.append(_key_hash(record.get("name")))
+        self.size += length
+
+    def skip(self, length):
+        self.size += length  # blank line: part of the previous record's span
+
+    def write(self, path, mtime_ns):
+        count = len(self.offsets)
+        slots = 2
+        while slots < 2 * count:
+            slots *= 2
+        id_hashes, id_records = _table(self.ids, slots)
+        name_hashes, name_records = _table(self.names, slots)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(INDEX_MAGIC, count, slots, self.size, mtime_ns))
+            self.offsets.tofile(f)
+            array("Q", [self.size]).tofile(f)
+            for part in (id_hashes, name_hashes, id_records, name_records):
+                part.tofile(f)
+        os.replace(tmp, path)
+        return count
+
+
+def write_roster(records, path):
+    """Write records (dicts with "id" and "name") as a roster and its index. Returns the count."""
+    builder = _IndexBuilder()
+    tmp = path + ".tmp"
+    with open(tmp, "wb", buffering=WRITE_BUFFER) as f:
+        for record in records:
+            line = json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+            f.write(line)
+            builder.add(record, len(line))
+    os.replace(tmp, path)
+    return builder.write(index_path(path), os.stat(path).st_mtime_ns)
+
+
+def build_index(path):
+    """(Re)build the index of an existing NDJSON roster. Returns the count."""
+    builder = _IndexBuilder()
+    with open(path, "rb") as f:
+        mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+        for line in f:
+            if line.isspace():
+                builder.skip(len(line))
+            else:
+                builder.add(json.loads(line), len(line))
+    return builder.write(index_path(path), mtime_ns)
+
+
+def convert_literal(source, path):
+    """
+    Convert a roster in the old format (a Python literal list, read with
+    ast.literal_eval) to NDJSON. Names become {"id": position, "name": name};
+    dicts are kept, with their position as id if they have none.
+    """
+    with open(source, "r", encoding="utf-8") as f:
+        items = ast.literal_eval(f.read().strip())
+
+    def records():
+        for i, item in enumerate(items):
+            if isinstance(item, dict):
+                record = dict(item)
+                record.setdefault("id", i)
+            else:
+                record = {"id": i, "name": item}
+            yield record
+    return write_roster(records(), path)
+
+
+def _map(path):
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class Roster:
+    """Records of an NDJSON roster by position, id or name, straight from the mapped files."""
+
+    def __init__(self, path):
+        self.path = path
+        self._mtime_ns = os.stat(path).st_mtime_ns
+        self._data = _map(path)
+        if not self._load_index():
+            build_index(path)
+            if not self._load_index():
+                raise ValueError(f"{index_path(path)} is not a roster index")
+
+    def _load_index(self):
+        try:
+            index = _map(index_path(self.path))
+        except FileNotFoundError:
+            return False
+        magic, count, slots, size, mtime_ns = (_HEADER.unpack_from(index)
+                                               if len(index) >= _HEADER.size
+                                               else (None, 0, 0, 0, 0))
+        if magic != INDEX_MAGIC or size != len(self._data) or mtime_ns != self._mtime_ns:
+            if isinstance(index, mmap.mmap):
+                index.close()
+            return False
+        self._index = index
+        self._count = count
+        view = memoryview(index)
+        start = _HEADER.size
+        parts = []
+        for code, length in (("Q", count + 1), ("Q", slots), ("Q", slots), ("I", slots), ("I", slots)):
+            end = start + length * struct.calcsize(code)
+            parts.append(view[start:end].cast(code))
+            start = end
+        self._offsets, self._id_hashes, self._name_hashes, self._id_records, self._name_records = parts
+        self._mask = slots - 1
+        return True
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, i):
+        if not 0 <= i < self._count:
+            raise IndexError("roster index out of range")
+        return json.loads(self._data[self._offsets[i]:self._offsets[i + 1]])
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self[i]
+
+    def _probe(self, value, hashes, records):
+        """Numbers of the records whose key hashes like value."""
+        h = _key_hash(value)
+        slot = h & self._mask
+        while records[slot]:
+            if hashes[slot] == h:
+                yield records[slot] - 1
+            slot = (slot + 1) & self._mask
+
+    def get(self, id, default=None):
+        """The record with this id (the first one, if ids repeat)."""
+        for i in sorted(self._probe(id, self._id_hashes, self._id_records)):
+            record = self[i]
+            if record.get("id") == id:
+                return record
+        return default
+
+    def by_name(self, name):
+        """Every record with exactly this name, in roster order."""
+        records = (self[i] for i in sorted(self._probe(name, self._name_hashes, self._name_records)))
+        return [record for record in records if record.get("name") == name]
+
+    def close(self):
+        for part in (self._offsets, self._id_hashes, self._name_hashes,
+                     self._id_records, self._name_records):
+            part.release()
+        for mapped in (self._index, self._data):
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    sub = parser.add_subparsers(dest="command", required=True)
+    convert = sub.add_parser("convert", help="old literal roster -> NDJSON roster and index")
+    convert.add_argument("source")
+    convert.add_argument("roster")
+    show = sub.add_parser("show", help="print records, all or the ones asked for")
+    show.add_argument("roster")
+    show.add_argument("--id", type=json.loads, help="a JSON value, e.g. 3 or '\"a12\"'")
+    show.add_argument("--name")
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        print(f"{convert_literal(args.source, args.roster):,} records -> {args.roster}")
+        return
+    with Roster(args.roster) as roster:
+        if args.id is not None:
+            records = [record for record in [roster.get(args.id)] if record is not None]
+        elif args.name is not None:
+            records = roster.by_name(args.name)
+        else:
+            records = roster
+        for record in records:
+            print(json.dumps(record, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Load-time and memory benchmark: roster.py against ast.literal_eval.
+
+Writes a synthetic roster of --students names in the old literal format,
+converts it with roster.convert_literal and then, each in a fresh process so
+that peak RSS is its own, measures:
+
+    open     time until the first record can be used
+    iterate  time to go through every record
+    lookups  time for --lookups lookups by name (a list scan for literal_eval)
+    RSS      peak resident set size of the process
+
+    python roster_bench.py --students 1000000
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def make_literal(path, students, seed=0):
+    rng = random.Random(seed)
+    names = [f"Aluno {rng.randrange(students * 10):07d}" for _ in range(students)]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(repr(names))
+    return names
+
+
+def run_literal(path, names):
+    import ast
+    start = time.perf_counter()
+    with open(path, "r") as f:
+        alunos = ast.literal_eval(f.read().strip())
+    opened = time.perf_counter()
+    for aluno in alunos:
+        pass
+    iterated = time.perf_counter()
+    for name in names:
+        alunos.index(name)
+    return opened - start, iterated - opened, time.perf_counter() - iterated
+
+
+def run_roster(path, names):
+    from roster import Roster
+    start = time.perf_counter()
+    roster = Roster(path)
+    roster[0]
+    opened = time.perf_counter()
+    for aluno in roster:
+        pass
+    iterated = time.perf_counter()
+    for name in names:
+        roster.by_name(name)
+    return opened - start, iterated - opened, time.perf_counter() - iterated
+
+
+def peak_rss_mib():
+    # VmHWM starts over at exec; ru_maxrss would also count the parent's peak.
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+
+def child(method, path, names_path):
+    with open(names_path) as f:
+        names = json.load(f)
+    times = (run_literal if method == "literal_eval" else run_roster)(path, names)
+    print(json.dumps([*times, peak_rss_mib()]))
+
+
+def measure(method, path, names_path):
+    out = subprocess.run([sys.executable, __file__, "--child", method, path, names_path],
+                         check=True, capture_output=True, text=True, cwd=HERE).stdout
+    return json.loads(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--students", type=int, default=200_000)
+    parser.add_argument("--lookups", type=int, default=100)
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child)
+        return
+
+    from roster import convert_literal
+    with tempfile.TemporaryDirectory() as tmp:
+        literal = os.path.join(tmp, "alunos.txt")
+        ndjson = os.path.join(tmp, "alunos.ndjson")
+        names_path = os.path.join(tmp, "names.json")
+        names = make_literal(literal, args.students)
+        with open(names_path, "w") as f:
+            json.dump(random.Random(1).sample(names, min(args.lookups, len(names))), f)
+        start = time.perf_counter()
+        convert_literal(literal, ndjson)
+        converted = time.perf_counter() - start
+
+        print(f"{args.students:,} students, {os.path.getsize(literal) / 2**20:.1f} MiB literal, "
+              f"converted in {converted:.2f} s")
+        print(f"{'method':<14}{'open ms':>10}{'iterate ms':>12}{'lookups ms':>12}{'RSS MiB':>10}")
+        for method, path in (("literal_eval", literal), ("roster", ndjson)):
+            opened, iterated, lookups, rss = measure(method, path, names_path)
+            print(f"{method:<14}{opened * 1000:>10.1f}{iterated * 1000:>12.1f}"
+                  f"{lookups * 1000:>12.1f}{rss:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
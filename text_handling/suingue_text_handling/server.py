@@ -0,0 +1,87 @@
+"""
+Line-protocol TCP server for THE MACHINE.
+
+Every connection gets its own session dialog; all of them run as coroutines
+in one process and share the machine's single log writer.
+
+    python machine.py serve --host 0.0.0.0 --port 7777
+    nc localhost 7777
+"""
+import argparse
+import asyncio
+import signal
+
+# Sessions that stay silent this long are ended, so idle sockets don't pile up.
+IDLE_TIMEOUT = 15 * 60
+MAX_LINE = 4096
+
+
+async def handle_operator(reader, writer, new_dialog, idle_timeout=IDLE_TIMEOUT):
+    """Drive one session dialog with lines read from the connection."""
+    output = []
+    dialog = new_dialog(output.append)
+    try:
+        prompt = next(dialog)
+        while True:
+            output.append(prompt)
+            writer.write("".join(output).encode("utf-8"))
+            output.clear()
+            await writer.drain()
+            try:
+                line = await asyncio.wait_for(reader.readline(), idle_timeout)
+            except (asyncio.TimeoutError, ValueError):
+                # Idle for too long, or a line longer than the stream limit.
+                line = b""
+            if not line:
+                prompt = dialog.throw(EOFError)
+            else:
+                prompt = dialog.send(line.decode("utf-8", "replace").rstrip("\r\n"))
+    except StopIteration:
+        if output:
+            writer.write("".join(output).encode("utf-8"))
+    except ConnectionError:
+        # The operator vanished; still let the session log its end.
+        try:
+            dialog.throw(EOFError)
+        except StopIteration:
+            pass
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+async def serve(host, port, new_dialog, idle_timeout=IDLE_TIMEOUT):
+    server = await asyncio.start_server(
+        lambda r, w: handle_operator(r, w, new_dialog, idle_timeout),
+        host, port, limit=MAX_LINE, backlog=1024)
+    addresses = ", ".join(str(sock.getsockname()) for sock in server.sockets)
+    print(f"THE MACHINE is listening on {addresses}")
+
+    # Stop cleanly on Ctrl-C or SIGTERM so the log writer can drain its queue.
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass
+    async with server:
+        await stop.wait()
+    print("\nServer stopped.")
+
+
+def main(argv, new_dialog):
+    """
+    Entry point for `machine.py serve`.
+    new_dialog(write) must return a fresh session dialog generator.
+    """
+    parser = argparse.ArgumentParser(prog="machine.py serve")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7777)
+    parser.add_argument("--idle-timeout", type=float, default=IDLE_TIMEOUT,
+                        help="seconds of silence before a session is closed")
+    args = parser.parse_args(argv)
+    asyncio.run(serve(args.host, args.port, new_dialog, args.idle_timeout))
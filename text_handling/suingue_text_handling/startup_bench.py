@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Time-to-first-prompt benchmark for THE MACHINE.
+
+Starts the machine again and again and measures how long it takes until the
+"operator: $ " prompt shows up, for the source script and for whichever
+PyInstaller builds exist (dist/machine one-file, dist/machine/machine one-dir).
+
+    python startup_bench.py --runs 20
+    python startup_bench.py --target ./dist/machine
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PROMPT = b"operator: $ "
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def default_targets():
+    targets = {"source": [sys.executable, os.path.join(HERE, "machine.py")]}
+    onefile = os.path.join(HERE, "dist", "machine")
+    onedir = os.path.join(HERE, "dist", "machine", "machine")
+    if os.path.isfile(onefile):
+        targets["frozen one-file"] = [onefile]
+    elif os.path.isfile(onedir):
+        targets["frozen one-dir"] = [onedir]
+    return targets
+
+
+def time_to_prompt(command, env):
+    """Seconds from spawning command until it prints the operator prompt."""
+    start = time.perf_counter()
+    proc = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL, env=env)
+    seen = b""
+    while PROMPT not in seen:
+        chunk = os.read(proc.stdout.fileno(), 4096)
+        if not chunk:
+            proc.wait()
+            raise RuntimeError(f"{command[0]} exited before showing the prompt")
+        seen += chunk
+    elapsed = time.perf_counter() - start
+    proc.communicate(b"quit\n")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--target", action="append",
+                        help="executable to time instead of the defaults (repeatable)")
+    args = parser.parse_args()
+
+    targets = ({path: [path] for path in args.target} if args.target
+               else default_targets())
+    with tempfile.TemporaryDirectory() as tmp:
+        # Keep the benchmark's sessions out of the real log database.
+        env = dict(os.environ,
+                   MACHINE_LOG_DB=os.path.join(tmp, "bench.db"),
+                   MACHINE_METRICS=os.path.join(tmp, "metrics.ndjson"))
+        print(f"{'target':<20}{'min ms':>10}{'median ms':>12}{'max ms':>10}")
+        for name, command in targets.items():
+            time_to_prompt(command, env)  # warm the page cache
+            times = [time_to_prompt(command, env) for _ in range(args.runs)]
+            print(f"{name:<20}{min(times) * 1000:>10.1f}"
+                  f"{statistics.median(times) * 1000:>12.1f}{max(times) * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
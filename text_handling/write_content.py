@@ -1,13 +1,210 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+import tempfile
+import time
+from multiprocessing import Pool
+
+# Gera um boletim por aluno a partir de registros (aluno, disciplina, nota):
+# 1 Ler os registros em fluxo: CSV (aluno,disciplina,nota), NDJSON
+#   ({"aluno": ..., "disciplina": ..., "nota": ...}) ou qualquer gerador de tuplas.
+#   As linhas de um mesmo aluno vêm juntas, uma depois da outra.
+# 2 Escrever os boletins num arquivo temporário com buffer grande e só no fim
+#   trocar pelo destino (os.replace): rodar de novo substitui, não duplica, e
+#   quem lê o boletim nunca vê um arquivo pela metade.
+# 3 Opcional (--partes N): N processos, cada um com um pedaço do arquivo de
+#   entrada e o seu próprio arquivo de saída (boletim.000.txt, boletim.001.txt...).
+
 alunos = [ 'Claudinho', 'Bochecha']
 
 disciplinas = [ 'Suingue', 'Harmônia', 'Improviso', 'Chachado']
 
 notas = (10, 9, 8, 10)
 
-conteudo = []
+BUFFER = 1 << 20
+CABECALHO = ["aluno", "disciplina", "nota"]
+
+
+def exemplo():
+    """Os registros da turma de exemplo: todo aluno com as mesmas notas."""
+    for aluno in alunos:
+        for disciplina, nota in zip(disciplinas, notas):
+            yield aluno, disciplina, nota
+
+
+def boletim(aluno, notas_do_aluno):
+    linhas = [f"Boletim de {aluno}\n"]
+    linhas.extend(f"A nota da {disciplina} foi {nota}\n" for _, disciplina, nota in notas_do_aluno)
+    linhas.append("\n")
+    return "".join(linhas), len(linhas) - 2
+
+
+def escrever(registros, arq):
+    """Escreve em arq um boletim por aluno. Devolve (alunos, linhas de nota)."""
+    total_alunos = total_linhas = 0
+    for aluno, grupo in itertools.groupby(registros, key=lambda registro: registro[0]):
+        texto, linhas = boletim(aluno, grupo)
+        arq.write(texto)
+        total_alunos += 1
+        total_linhas += linhas
+    return total_alunos, total_linhas
+
+
+def _modo_padrao():
+    # mkstemp cria com 0o600; um open() comum daria 0o666 menos a umask
+    mascara = os.umask(0)
+    os.umask(mascara)
+    return 0o666 & ~mascara
+
+
+def gerar_boletins(registros, destino, buffer=BUFFER):
+    """Escreve os boletins em destino de uma vez só (temporário + rename)."""
+    pasta = os.path.dirname(os.path.abspath(destino))
+    fd, temporario = tempfile.mkstemp(dir=pasta, prefix=".boletim-", suffix=".tmp")
+    try:
+        try:
+            arq = open(fd, "w", encoding="utf-8", buffering=buffer)
+        except BaseException:
+            os.close(fd)
+            raise
+        with arq:
+            contagem = escrever(registros, arq)
+            arq.flush()
+            os.fsync(arq.fileno())
+        os.chmod(temporario, _modo_padrao())
+        os.replace(temporario, destino)
+    except BaseException:
+        os.unlink(temporario)
+        raise
+    return contagem
+
+
+# -- leitura -------------------------------------------------------------------
+
+def formato(caminho):
+    return "ndjson" if caminho.endswith((".ndjson", ".jsonl")) else "csv"
+
+
+def registros_de_linhas(linhas, fmt):
+    """(aluno, disciplina, nota) para cada linha de texto; pula vazias e o cabeçalho."""
+    if fmt == "csv":
+        for linha in csv.reader(linhas):
+            if linha and linha != CABECALHO:
+                yield linha[0], linha[1], linha[2]
+        return
+    for linha in linhas:
+        if linha.strip():  # '' também: "".isspace() é False
+            registro = json.loads(linha)
+            yield registro["aluno"], registro["disciplina"], registro["nota"]
+
+
+def ler(caminho):
+    with open(caminho, encoding="utf-8", newline="") as arq:
+        yield from registros_de_linhas(arq, formato(caminho))
+
+
+# -- partes em paralelo ----------------------------------------------------------
+#
+# A entrada é dividida em N faixas de bytes. Um aluno fica com a parte onde
+# começa a primeira linha dele: cada parte pula as linhas que continuam o
+# aluno da parte anterior e passa do fim da sua faixa até o aluno terminar.
+# Juntando as partes em ordem dá exatamente o arquivo sem partes.
+
+def _aluno_da_linha(linha, fmt):
+    for registro in registros_de_linhas([linha.decode("utf-8")], fmt):
+        return registro[0]
+    return None
+
+
+def _ultima_linha_antes(arq, posicao):
+    """A última linha não vazia que termina antes de posicao (início de uma linha)."""
+    tamanho = 4096
+    while True:
+        inicio = max(0, posicao - tamanho)
+        arq.seek(inicio)
+        bloco = arq.read(posicao - inicio).rstrip()
+        corte = bloco.rfind(b"\n")
+        if corte >= 0 or inicio == 0:
+            return bloco[corte + 1:]
+        tamanho *= 2
+
+
+def _linhas_da_faixa(caminho, inicio, fim, fmt):
+    with open(caminho, "rb") as arq:
+        posicao = 0
+        linhas = iter(arq)
+        if inicio > 0:
+            arq.seek(inicio - 1)
+            posicao = inicio - 1 + len(arq.readline())
+            anterior = _aluno_da_linha(_ultima_linha_antes(arq, posicao), fmt)
+            arq.seek(posicao)
+            for linha in linhas:
+                if _aluno_da_linha(linha, fmt) not in (None, anterior):
+                    break
+                posicao += len(linha)  # ainda é o aluno da parte anterior
+            else:
+                return
+            if posicao >= fim:
+                return
+            linhas = itertools.chain([linha], linhas)
+
+        ultima = atual = None
+        for linha in linhas:
+            if posicao >= fim:
+                if atual is None and ultima is not None:
+                    atual = _aluno_da_linha(ultima, fmt)
+                if _aluno_da_linha(linha, fmt) not in (None, atual):
+                    return
+            elif not linha.isspace():
+                ultima = linha
+            posicao += len(linha)
+            yield linha.decode("utf-8")
+
+
+def _escrever_parte(caminho, inicio, fim, destino):
+    fmt = formato(caminho)
+    return gerar_boletins(registros_de_linhas(_linhas_da_faixa(caminho, inicio, fim, fmt), fmt),
+                          destino)
+
+
+def nome_da_parte(destino, parte):
+    base, ext = os.path.splitext(destino)
+    return f"{base}.{parte:03d}{ext}"
+
+
+def gerar_em_partes(caminho, destino, partes):
+    """Boletins de um arquivo CSV/NDJSON (um registro por linha) em partes arquivos."""
+    tamanho = os.path.getsize(caminho)
+    limites = [tamanho * parte // partes for parte in range(partes + 1)]
+    tarefas = [(caminho, limites[parte], limites[parte + 1], nome_da_parte(destino, parte))
+               for parte in range(partes)]
+    with Pool(partes) as pool:
+        contagens = pool.starmap(_escrever_parte, tarefas)
+    return tuple(map(sum, zip(*contagens)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera um boletim por aluno.")
+    parser.add_argument("entrada", nargs="?",
+                        help="CSV (aluno,disciplina,nota) ou NDJSON; sem entrada usa a turma de exemplo")
+    parser.add_argument("--saida", default="boletim.txt")
+    parser.add_argument("--partes", type=int, default=1,
+                        help="divide a entrada entre N processos, cada um com o seu arquivo de saída")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    if args.entrada is None:
+        total_alunos, total_linhas = gerar_boletins(exemplo(), args.saida)
+    elif args.partes > 1:
+        total_alunos, total_linhas = gerar_em_partes(args.entrada, args.saida, args.partes)
+    else:
+        total_alunos, total_linhas = gerar_boletins(ler(args.entrada), args.saida)
+    segundos = time.perf_counter() - inicio
+    print(f"{total_alunos:,} boletins, {total_linhas:,} notas em {segundos:.2f} s "
+          f"({total_linhas / max(segundos, 1e-9) * 60:,.0f} linhas/min)")
 
-for i in range(len(notas)):
-    conteudo.append(f"A nota da {disciplinas[i]} foi {notas[i]}\n")
 
-with open("boletim.txt", 'a') as arq:
-    arq.writelines(conteudo)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
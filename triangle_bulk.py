@@ -0,0 +1,194 @@
+"""
+Bulk version of triangle.checkTriangleInts for millions of side triples.
+
+Sides come as an N x 3 array; every check runs as one vectorized pass over
+all rows. The rule is the same as checkTriangleInts: all sides positive and
+no side longer than the sum of the other two (so flat, degenerate triangles
+count as valid).
+
+Integer sides stay integers, so the checks are exact however large they are
+(up to the dtype's range); anything else is checked as float64.
+
+Files are read chunk by chunk, so ~100M rows can be checked with constant
+memory: a CSV/text file with three numbers per line, or a raw binary dump of
+float64 (or --dtype) triples as written by ndarray.tofile().
+
+    python triangle_bulk.py sides.csv --classify --area
+    python triangle_bulk.py sides.f64 --binary --mask-out valid.u8
+"""
+import argparse
+import itertools
+import os
+import time
+
+import numpy as np
+
+# Codes returned by classify().
+INVALID, DEGENERATE, EQUILATERAL, ISOSCELES, SCALENE = range(5)
+KINDS = ("invalid", "degenerate", "equilateral", "isosceles", "scalene")
+
+# Rows per chunk when reading files.
+CHUNK_ROWS = 1 << 20
+
+
+def _sides(sides):
+    sides = np.asarray(sides)
+    if sides.dtype.kind not in "iu":
+        sides = sides.astype(np.float64, copy=False)
+    if sides.ndim != 2 or sides.shape[1] != 3:
+        raise ValueError(f"expected an N x 3 array of sides, got shape {sides.shape}")
+    return sides
+
+
+def _sorted(sides):
+    # Largest side first: a >= b >= c, with min/max instead of a full sort.
+    x, y, z = sides.T
+    lo, hi = np.minimum(x, y), np.maximum(x, y)
+    return np.maximum(hi, z), np.maximum(lo, np.minimum(hi, z)), np.minimum(lo, z)
+
+
+def _too_long(a, b, c):
+    # a > b + c. Integers compare a - b with c instead: with a >= b >= c > 0
+    # that cannot overflow, where b + c can.
+    if a.dtype.kind == "f":
+        return a > b + c
+    return a - b > c
+
+
+def _flat(a, b, c):
+    if a.dtype.kind == "f":
+        return a == b + c
+    return a - b == c
+
+
+def _valid(a, b, c):
+    return (c > 0) & ~_too_long(a, b, c)
+
+
+def _classify(a, b, c):
+    kind = np.full(a.shape, SCALENE, dtype=np.int8)
+    kind[(a == b) | (b == c)] = ISOSCELES
+    kind[a == c] = EQUILATERAL
+    kind[_flat(a, b, c)] = DEGENERATE
+    kind[(c <= 0) | _too_long(a, b, c)] = INVALID
+    return kind
+
+
+def _area(a, b, c):
+    invalid = (c <= 0) | _too_long(a, b, c)
+    flat = _flat(a, b, c)
+    a, b, c = (side.astype(np.float64, copy=False) for side in (a, b, c))
+    with np.errstate(invalid="ignore"):
+        product = (a + (b + c)) * (c - (a - b)) * (c + (a - b)) * (a + (b - c))
+        area = 0.25 * np.sqrt(product)
+    area[invalid] = np.nan
+    # Rounding can turn a flat triangle's zero into a tiny negative under the root.
+    area[flat] = 0.0
+    return area
+
+
+def valid_mask(sides):
+    """Boolean array: row i is a triangle by checkTriangleInts' rule."""
+    return _valid(*_sorted(_sides(sides)))
+
+
+def classify(sides):
+    """int8 codes per row, indexes into KINDS."""
+    return _classify(*_sorted(_sides(sides)))
+
+
+def heron_area(sides):
+    """
+    Area per row by Heron's formula, NaN for invalid rows. Uses the
+    rearrangement that stays accurate for needle-shaped triangles.
+    """
+    return _area(*_sorted(_sides(sides)))
+
+
+def check_triangles(sides, kinds=False, area=False):
+    """Dict with "valid" and, if asked for, "kind" and "area" arrays (sides sorted once)."""
+    a, b, c = _sorted(_sides(sides))
+    result = {"valid": _valid(a, b, c)}
+    if kinds:
+        result["kind"] = _classify(a, b, c)
+    if area:
+        result["area"] = _area(a, b, c)
+    return result
+
+
+def read_chunks(path, binary=False, dtype=np.float64, chunk_rows=CHUNK_ROWS, delimiter=","):
+    """Yield N x 3 arrays of dtype of at most chunk_rows rows from a file."""
+    if binary:
+        if os.path.getsize(path) == 0:
+            return  # np.memmap cannot map an empty file
+        rows = np.memmap(path, dtype=dtype, mode="r").reshape(-1, 3)
+        for start in range(0, len(rows), chunk_rows):
+            yield rows[start:start + chunk_rows]
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        while True:
+            lines = list(itertools.islice(f, chunk_rows))
+            if not lines:
+                return
+            if not any(line.strip() for line in lines):
+                continue  # loadtxt would warn and give a 0 x 1 array
+            yield np.loadtxt(lines, delimiter=delimiter, ndmin=2, dtype=dtype)
+
+
+def check_file(path, kinds=False, area=False, mask_out=None, **read_options):
+    """
+    Check every triple of a file chunk by chunk. Returns a summary dict with the
+    row count, valid count, per-kind counts and total area. With mask_out, the
+    valid mask is also written there, one byte (0/1) per row.
+    """
+    summary = {"rows": 0, "valid": 0}
+    kind_counts = np.zeros(len(KINDS), dtype=np.int64)
+    total_area = 0.0
+    mask_file = open(mask_out, "wb") if mask_out else None
+    try:
+        for chunk in read_chunks(path, **read_options):
+            result = check_triangles(chunk, kinds=kinds, area=area)
+            summary["rows"] += len(chunk)
+            summary["valid"] += int(np.count_nonzero(result["valid"]))
+            if kinds:
+                kind_counts += np.bincount(result["kind"], minlength=len(KINDS))
+            if area:
+                total_area += float(np.nansum(result["area"]))
+            if mask_file:
+                result["valid"].view(np.uint8).tofile(mask_file)
+    finally:
+        if mask_file:
+            mask_file.close()
+    if kinds:
+        summary["kinds"] = dict(zip(KINDS, kind_counts.tolist()))
+    if area:
+        summary["total_area"] = total_area
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("path")
+    parser.add_argument("--binary", action="store_true", help="raw binary triples instead of text")
+    parser.add_argument("--dtype", choices=("float32", "float64", "int32", "int64"),
+                        default="float64", help="element type of the sides (binary or text)")
+    parser.add_argument("--delimiter", default=",")
+    parser.add_argument("--chunk", type=int, default=CHUNK_ROWS, help="rows per chunk")
+    parser.add_argument("--classify", action="store_true")
+    parser.add_argument("--area", action="store_true")
+    parser.add_argument("--mask-out", help="write the valid mask here, one byte per row")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    summary = check_file(args.path, kinds=args.classify, area=args.area, mask_out=args.mask_out,
+                         binary=args.binary, dtype=np.dtype(args.dtype),
+                         chunk_rows=args.chunk, delimiter=args.delimiter)
+    elapsed = time.perf_counter() - start
+    for key, value in summary.items():
+        print(f"{key}: {value}")
+    print(f"{summary['rows'] / max(elapsed, 1e-9):,.0f} rows/s "
+          f"({os.path.getsize(args.path) / 2**20:.1f} MiB in {elapsed:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,51 +1,239 @@
+import numpy as np
+
+
+def _dados(v):
+    # Vector/VectorBatch -> ndarray; listas e arrays passam por np.asarray (sem cópia se já for array)
+    return v.data if isinstance(v, (Vector, VectorBatch)) else np.asarray(v)
+
+
+def _saida(out):
+    return None if out is None else _dados(out)
+
+
+def _devolver(res, out, tipo):
+    # com out= devolve o próprio out (Vector, VectorBatch ou ndarray), senão embrulha o resultado
+    return out if out is not None else tipo(res)
+
+
+def _no_lugar(metodo, destino, outro):
+    # v += x, v -= x e v *= x escrevem em v.data: o resultado precisa caber no
+    # dtype dele (um vetor de inteiros *= 0.5 não dá), ao contrário de v * x
+    tipo = np.result_type(destino.data, _dados(outro))
+    if not np.can_cast(tipo, destino.data.dtype, "same_kind"):
+        raise TypeError(f"resultado {tipo} não cabe no dtype {destino.data.dtype}; "
+                        f"use v = v * x (ou v + x, v - x) para criar um novo")
+    return metodo(outro, out=destino)
+
+
+class Vector:
+    """
+    Vetor 1-D guardado num ndarray. As operações rodam vetorizadas no NumPy;
+    passe out= (outro Vector ou ndarray do mesmo tamanho, inclusive o próprio
+    vetor) para escrever o resultado sem alocar memória nova.
+    """
+
+    def __init__(self, valores, dtype=None):
+        self.data = np.asarray(_dados(valores), dtype=dtype)
+        if self.data.ndim != 1:
+            raise ValueError(f"Vector precisa de 1 dimensão, recebeu shape {self.data.shape}")
+
+    def __len__(self):
+        return len(self.data)
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __array__(self, dtype=None, copy=None):
+        return self.data if dtype is None else self.data.astype(dtype, copy=False)
+
+    def __repr__(self):
+        return f"Vector({self.data.tolist()})"
+
+    def __eq__(self, other):
+        return np.array_equal(self.data, _dados(other))
+
+    def tolist(self):
+        return self.data.tolist()
+
+    def add(self, other, out=None):
+        return _devolver(np.add(self.data, _dados(other), out=_saida(out)), out, Vector)
+
+    def sub(self, other, out=None):
+        return _devolver(np.subtract(self.data, _dados(other), out=_saida(out)), out, Vector)
+
+    def neg(self, out=None):
+        return _devolver(np.negative(self.data, out=_saida(out)), out, Vector)
+
+    def scale(self, num, out=None):
+        return _devolver(np.multiply(self.data, num, out=_saida(out)), out, Vector)
+
+    def dot(self, other):
+        # np.asarray: com dtype object (ints além de int64) o np.dot já devolve um int do Python
+        return np.asarray(np.dot(self.data, _dados(other))).item()
+
+    def norm(self):
+        return float(np.sqrt(self.dot(self)))
+
+    __add__ = add
+    __sub__ = sub
+    __neg__ = neg
+    __mul__ = __rmul__ = scale
+
+    def __iadd__(self, other):
+        return _no_lugar(self.add, self, other)
+
+    def __isub__(self, other):
+        return _no_lugar(self.sub, self, other)
+
+    def __imul__(self, num):
+        return _no_lugar(self.scale, self, num)
+
+
+class VectorBatch:
+    """
+    N vetores de dimensão D numa matriz N×D. Cada operação vale para todas as
+    linhas de uma vez; o outro operando pode ser outro lote N×D ou um único
+    vetor de tamanho D (aplicado a todas as linhas por broadcasting).
+    """
+
+    def __init__(self, valores, dtype=None):
+        self.data = np.asarray(_dados(valores), dtype=dtype)
+        if self.data.ndim != 2:
+            raise ValueError(f"VectorBatch precisa de 2 dimensões, recebeu shape {self.data.shape}")
+
+    @classmethod
+    def empty(cls, n, dim, dtype=np.float64):
+        """Lote sem inicializar, para ser usado como out=."""
+        return cls(np.empty((n, dim), dtype=dtype))
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, i):
+        # lote[0] é um Vector, uma fatia (lote[0:2]) ou máscara é outro lote e
+        # lote[0, 1] é o número
+        linhas = self.data[i]
+        if linhas.ndim == 2:
+            return VectorBatch(linhas)
+        return Vector(linhas) if linhas.ndim == 1 else linhas.item()
+
+    def __iter__(self):
+        return (Vector(linha) for linha in self.data)
+
+    def __array__(self, dtype=None, copy=None):
+        return self.data if dtype is None else self.data.astype(dtype, copy=False)
+
+    def __repr__(self):
+        return f"VectorBatch(shape={self.data.shape}, dtype={self.data.dtype})"
+
+    def add(self, other, out=None):
+        return _devolver(np.add(self.data, _dados(other), out=_saida(out)), out, VectorBatch)
+
+    def sub(self, other, out=None):
+        return _devolver(np.subtract(self.data, _dados(other), out=_saida(out)), out, VectorBatch)
+
+    def neg(self, out=None):
+        return _devolver(np.negative(self.data, out=_saida(out)), out, VectorBatch)
+
+    def scale(self, num, out=None):
+        """num pode ser um escalar ou um fator por linha (tamanho N)."""
+        num = np.asarray(num)
+        if num.ndim == 1:
+            num = num[:, None]
+        return _devolver(np.multiply(self.data, num, out=_saida(out)), out, VectorBatch)
+
+    def dot(self, other, out=None):
+        """Produto escalar linha a linha: devolve um array de N valores."""
+        other = _dados(other)
+        spec = "ij,ij->i" if other.ndim == 2 else "ij,j->i"
+        return np.einsum(spec, self.data, other, out=_saida(out))
+
+    def norm(self, out=None):
+        res = self.dot(self, out=out)
+        if out is not None and res.dtype.kind == "f":
+            return np.sqrt(res, out=res)
+        # lotes inteiros: a raiz não cabe num array de inteiros
+        return np.sqrt(res)
+
+    __add__ = add
+    __sub__ = sub
+    __neg__ = neg
+    __mul__ = __rmul__ = scale
+
+    def __iadd__(self, other):
+        return _no_lugar(self.add, self, other)
+
+    def __isub__(self, other):
+        return _no_lugar(self.sub, self, other)
+
+    def __imul__(self, num):
+        return _no_lugar(self.scale, self, num)
+
+
+# Funções antigas: continuam aceitando listas (e devolvendo listas), mas agora
+# também aceitam ndarray/Vector e aí devolvem ndarray, sem passar por listas.
+# Listas de inteiros são somadas como antes, com ints do Python (sem limite);
+# arrays e Vector de inteiros seguem o dtype do NumPy (int64 pode estourar).
+
+def _lista(*vs):
+    return all(isinstance(v, (list, tuple)) for v in vs)
+
+
+def _resultado(res, *vs):
+    return res.tolist() if _lista(*vs) else res
+
+
+def _inteiros(*vs):
+    # listas de inteiros seguem com a aritmética do Python: no NumPy viram
+    # int64 e estouram (2**62 + 2**62) ou viram dtype object
+    return _lista(*vs) and any(np.asarray(v).dtype.kind not in "fc" for v in vs)
+
+
 def somar(v1, v2):
 
     if len(v1) != len(v2):
         print("vetores incompatíveis")
         return 0
-    res = []
-    
-    for i in range(len(v1)):
-        res.append(v1[i] + v2[i])
 
-    return res
+    if _inteiros(v1, v2):
+        return [x + y for x, y in zip(v1, v2)]
+    return _resultado(np.add(_dados(v1), _dados(v2)), v1, v2)
 
 def subtrair(v1, v2):
-    
-    res = []
 
-    res.append(somar(v1, inverter(v2)))
+    if len(v1) != len(v2):
+        print("vetores incompatíveis")
+        return 0
 
-    return res
+    if _inteiros(v1, v2):
+        return [x - y for x, y in zip(v1, v2)]
+    return _resultado(np.subtract(_dados(v1), _dados(v2)), v1, v2)
 
 def inverter(v):
 
-    res = []
-
-    for i in range(len(v)):
-        res.append(-v[i])
-
-    return res
+    if _inteiros(v):
+        return [-x for x in v]
+    return _resultado(np.negative(_dados(v)), v)
 
 def multiplicar(vet, num):
 
-    return [vet[i] * num for i in range(len(vet))]
+    if _lista(vet) and _inteiros(vet, [num]):
+        return [x * num for x in vet]
+    return _resultado(np.multiply(_dados(vet), num), vet)
 
 def prod_escalar(v1, v2):
 
     if len(v1) != len(v2):
         print("vetores incompatíveis")
         return None
-        
-    res = 0
-
-    for i in range(len(v1)):
-
-        res += v1[i] * v2[i]
-
-    return res
 
-    pass
+    if _inteiros(v1, v2):
+        return sum(x * y for x, y in zip(v1, v2))
+    return np.asarray(np.dot(_dados(v1), _dados(v2))).item()
 
 if __name__ == '__main__':
     a = [2, 5, 3]
@@ -55,4 +243,4 @@ if __name__ == '__main__':
     print('Soma dos vetores a e b: ', somar(a,b))
     print('Diferença dos vetores a e b ', subtrair(a, b))
     print('Multiplicação de a por num: ', multiplicar(a, num))
-    print('produto escalar entre a e b: ', prod_escalar(a, b))
\ No newline at end of file
+    print('produto escalar entre a e b: ', prod_escalar(a, b))
@@ -0,0 +1,150 @@
+"""
+Out-of-core vector operations for vectors too big for vector.py's lists.
+
+A vector here is a flat binary dump of float32 or float64 values (what
+ndarray.tofile() writes). Files are opened with numpy.memmap and processed in
+fixed-size chunks of CHUNK_SIZE elements; every chunk is a view into the
+mapping, so nothing is copied and memory use stays flat no matter how big the
+file is. With workers > 1 the chunks are handed to a thread pool (NumPy
+releases the GIL inside dot/add/sum), and the partial results are combined in
+chunk order so the answer does not depend on the number of workers.
+
+    python vector_stream.py dot a.f64 b.f64
+    python vector_stream.py add a.f32 b.f32 --dtype float32 --out c.f32 --workers 4
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Elements per chunk: 8 MiB of float64, 4 MiB of float32.
+CHUNK_SIZE = 1 << 20
+
+
+def open_vector(source, dtype=np.float64, mode="r"):
+    """
+    A 1-D array over source without reading it: a memmap for a file path, a
+    zero-copy view for a buffer (bytes, mmap, ...), the array itself for arrays.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return np.memmap(source, dtype=dtype, mode=mode)
+    if isinstance(source, np.ndarray):
+        return source.reshape(-1)
+    return np.frombuffer(source, dtype=dtype)
+
+
+def create_vector(path, length, dtype=np.float64):
+    """A new zero-filled vector file of the given length, mapped for writing."""
+    return np.memmap(path, dtype=dtype, mode="w+", shape=(length,))
+
+
+def chunks(length, chunk_size=CHUNK_SIZE):
+    """Slices covering range(length) in steps of chunk_size."""
+    return [slice(start, min(start + chunk_size, length))
+            for start in range(0, length, chunk_size)]
+
+
+def _map(func, slices, workers):
+    if workers > 1 and len(slices) > 1:
+        with ThreadPoolExecutor(workers) as pool:
+            return list(pool.map(func, slices))
+    return [func(s) for s in slices]
+
+
+def _pair(a, b, dtype):
+    a, b = open_vector(a, dtype), open_vector(b, dtype)
+    if len(a) != len(b):
+        raise ValueError(f"vetores incompatíveis: {len(a)} != {len(b)}")
+    return a, b
+
+
+def _f64(chunk):
+    # float32 chunks are accumulated in float64, like stream_sum does
+    return chunk.astype(np.float64, copy=False)
+
+
+def stream_dot(a, b, dtype=np.float64, chunk_size=CHUNK_SIZE, workers=1):
+    """Dot product of two vectors (paths, buffers or arrays), accumulated in float64."""
+    a, b = _pair(a, b, dtype)
+    parts = _map(lambda s: float(np.dot(_f64(a[s]), _f64(b[s]))), chunks(len(a), chunk_size), workers)
+    return float(np.sum(parts))
+
+
+def stream_sum(a, dtype=np.float64, chunk_size=CHUNK_SIZE, workers=1):
+    """Sum of all elements, accumulated in float64."""
+    a = open_vector(a, dtype)
+    parts = _map(lambda s: float(np.sum(a[s], dtype=np.float64)), chunks(len(a), chunk_size), workers)
+    return float(np.sum(parts))
+
+
+def stream_norm(a, dtype=np.float64, chunk_size=CHUNK_SIZE, workers=1):
+    """Euclidean norm, accumulated in float64."""
+    a = open_vector(a, dtype)
+
+    def squares(s):
+        chunk = _f64(a[s])
+        return float(np.dot(chunk, chunk))
+
+    parts = _map(squares, chunks(len(a), chunk_size), workers)
+    return float(np.sqrt(np.sum(parts)))
+
+
+def stream_add(a, b, out, dtype=np.float64, chunk_size=CHUNK_SIZE, workers=1):
+    """
+    Element-wise a + b written into out: a path (created or overwritten) or an
+    already mapped/allocated array of the same length. Returns the output array.
+    """
+    a, b = _pair(a, b, dtype)
+    if isinstance(out, (str, os.PathLike)):
+        out = create_vector(out, len(a), dtype)
+    elif len(out) != len(a):
+        raise ValueError(f"saída com tamanho {len(out)}, esperado {len(a)}")
+
+    def add(s):
+        np.add(a[s], b[s], out=out[s])
+
+    _map(add, chunks(len(a), chunk_size), workers)
+    if isinstance(out, np.memmap):
+        out.flush()
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("op", choices=("dot", "sum", "norm", "add"))
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--dtype", choices=("float32", "float64"), default="float64")
+    parser.add_argument("--chunk", type=int, default=CHUNK_SIZE, help="elements per chunk")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--out", help="output file for add")
+    args = parser.parse_args()
+
+    options = dict(dtype=np.dtype(args.dtype), chunk_size=args.chunk, workers=args.workers)
+    needed = 2 if args.op in ("dot", "add") else 1
+    if len(args.files) != needed:
+        parser.error(f"{args.op} takes {needed} file(s)")
+    if args.op == "add" and not args.out:
+        parser.error("add needs --out")
+
+    start = time.perf_counter()
+    if args.op == "dot":
+        result = stream_dot(*args.files, **options)
+    elif args.op == "sum":
+        result = stream_sum(*args.files, **options)
+    elif args.op == "norm":
+        result = stream_norm(*args.files, **options)
+    else:
+        stream_add(*args.files, args.out, **options)
+        result = args.out
+    elapsed = time.perf_counter() - start
+
+    size = sum(os.path.getsize(path) for path in args.files)
+    print(result)
+    print(f"{size / 2**20:.1f} MiB in {elapsed:.3f} s "
+          f"({size / 2**20 / max(elapsed, 1e-9):.0f} MiB/s)")
+
+
+if __name__ == "__main__":
+    main()